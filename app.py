@@ -1,14 +1,22 @@
 import streamlit as st
 import pandas as pd
 import json
-import requests
-import os
 from PIL import Image
 import plotly.graph_objects as go
 from fpdf import FPDF
 import base64
 from datetime import datetime
 
+from wisewhisk.allergens import ALLERGEN_LEXICON
+from wisewhisk.analysis import analyze_ingredients, infer_intent
+from wisewhisk.charts import nutri_score_gauge, prerender_gauges
+from wisewhisk.custom_ingredients import get_custom_store
+from wisewhisk.foods import load_foods
+from wisewhisk.local_foods import LocalFoods
+from wisewhisk.openfoodfacts import fetch_open_food_facts, lookup_products, search_open_food_facts
+from wisewhisk.product import format_amount
+from wisewhisk.queries import parse_comparison
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="WiseWhisk - Ingredient Co-Pilot",
@@ -86,73 +94,23 @@ if 'history' not in st.session_state:
     st.session_state.history = []
 if 'profile' not in st.session_state:
     st.session_state.profile = {"goals": "Stay healthy", "allergies": []}
-if 'custom_ingredients' not in st.session_state:
-    st.session_state.custom_ingredients = []
 if 'messages' not in st.session_state:
     st.session_state.messages = [{"role": "assistant", "content": "👋 Welcome to **WiseWhisk**! I'm your intelligent Ingredient Co-Pilot. I've been optimized with a larger dataset from Open Food Facts. How can I help you today?"}]
 
 # --- Helper Functions ---
-@st.cache_data
+@st.cache_resource
 def load_optimized_data():
-    if os.path.exists("foods.csv"):
-        return pd.read_csv("foods.csv")
-    return pd.DataFrame(columns=["name", "calories", "fat", "sugar", "protein", "sodium", "labels"])
-
-def fetch_open_food_facts(barcode):
-    url = f"https://world.openfoodfacts.org/api/v2/product/{barcode}.json"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        return None
-    return None
+    return load_foods("foods.csv")
 
-def search_open_food_facts(query):
-    url = f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={query}&search_simple=1&action=process&json=1"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('products'):
-                return data['products'][0]
-    except:
-        return None
-    return None
+@st.cache_resource
+def load_local_foods():
+    return LocalFoods(load_optimized_data(), get_custom_store())
 
-def infer_intent(query):
-    query = query.lower()
-    if any(word in query for word in ["compare", "vs", "difference", "better than", "side by side"]):
-        return "comparison"
-    elif any(word in query for word in ["safe", "diabetic", "allergic", "risk", "bad for", "warning"]):
-        return "safety_check"
-    elif any(word in query for word in ["nutrition", "calories", "info", "protein", "sugar", "carbs"]):
-        return "nutrition_info"
-    else:
-        return "general_query"
+@st.cache_resource
+def prerender_charts():
+    prerender_gauges(("classic",))
 
-def generate_nutri_score_viz(score):
-    colors = {'A': '#038141', 'B': '#85BB2F', 'C': '#FECB02', 'D': '#EE8100', 'E': '#E63E11'}
-    score = score.upper() if score and score.upper() in colors else 'C'
-    fig = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = ord('E') - ord(score),
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': f"Nutri-Score: {score}", 'font': {'size': 20, 'color': '#1e5666'}},
-        gauge = {
-            'axis': {'range': [0, 4], 'tickvals': [0, 1, 2, 3, 4], 'ticktext': ['E', 'D', 'C', 'B', 'A']},
-            'bar': {'color': colors.get(score, 'gray')},
-            'steps': [
-                {'range': [0, 0.8], 'color': colors['E']},
-                {'range': [0.8, 1.8], 'color': colors['D']},
-                {'range': [1.8, 2.8], 'color': colors['C']},
-                {'range': [2.8, 3.8], 'color': colors['B']},
-                {'range': [3.8, 4], 'color': colors['A']},
-            ],
-        }
-    ))
-    fig.update_layout(height=220, margin=dict(l=20, r=20, t=50, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    return fig
+prerender_charts()
 
 def create_pdf_report(content, title="WiseWhisk Analysis Report"):
     """Fixed FPDF2 PDF generation"""
@@ -223,22 +181,20 @@ if menu == "Chat Interface":
         with st.chat_message("assistant"):
             if intent == "comparison":
                 st.markdown("### ⚖️ Side-by-Side Comparison")
-                items = prompt.lower().replace("compare", "").replace("side by side", "").split(" vs ")
-                if len(items) < 2: items = prompt.lower().split(" and ")
+                items = [m['name'] for m in parse_comparison(prompt)]
                 
                 if len(items) >= 2:
-                    item1, item2 = items[0].strip(), items[1].strip()
+                    item1, item2 = items[0], items[1]
                     col1, col2 = st.columns(2)
                     
-                    d1 = search_open_food_facts(item1)
-                    d2 = search_open_food_facts(item2)
+                    d1, d2 = lookup_products([item1, item2])
                     
                     with col1:
                         st.markdown(f"<div class='card'><h4>{item1.title()}</h4>", unsafe_allow_html=True)
                         if d1:
                             st.write(f"**Nutri-Score:** {d1.get('nutriscore_grade', 'N/A').upper()}")
                             st.write(f"**Energy:** {d1.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal")
-                            st.plotly_chart(generate_nutri_score_viz(d1.get('nutriscore_grade')), use_container_width=True)
+                            st.plotly_chart(nutri_score_gauge(d1.get('nutriscore_grade'), theme="classic"), use_container_width=True, key="gauge_d1")
                         else: st.write("No data found.")
                         st.markdown("</div>", unsafe_allow_html=True)
                     
@@ -247,7 +203,7 @@ if menu == "Chat Interface":
                         if d2:
                             st.write(f"**Nutri-Score:** {d2.get('nutriscore_grade', 'N/A').upper()}")
                             st.write(f"**Energy:** {d2.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal")
-                            st.plotly_chart(generate_nutri_score_viz(d2.get('nutriscore_grade')), use_container_width=True)
+                            st.plotly_chart(nutri_score_gauge(d2.get('nutriscore_grade'), theme="classic"), use_container_width=True, key="gauge_d2")
                         else: st.write("No data found.")
                         st.markdown("</div>", unsafe_allow_html=True)
                     
@@ -285,11 +241,9 @@ st.download_button(
             
             else:
                 st.write("WiseWhisk is looking that up for you...")
-                df = load_optimized_data()
-                match = df[df['name'].str.contains(prompt, case=False, na=False)]
-                if not match.empty:
-                    food = match.iloc[0]
-                    st.markdown(f"<div class='card'><b>{food['name']}</b>: {food['calories']} kcal, {food['protein']}g protein. Labels: {food['labels']}</div>", unsafe_allow_html=True)
+                food = load_local_foods().find(prompt)
+                if food is not None:
+                    st.markdown(f"<div class='card'><b>{food['name']}</b>: {format_amount(food['calories'])} kcal, {format_amount(food['protein'])}g protein. Labels: {food['labels']}</div>", unsafe_allow_html=True)
                 else:
                     st.write("I couldn't find specific data in the local cache, searching Open Food Facts...")
                     d = search_open_food_facts(prompt)
@@ -312,21 +266,21 @@ elif menu == "Scan Label":
                 st.write(f"**Brand:** {p.get('brands', 'N/A')}")
                 st.write(f"**Ingredients:** {p.get('ingredients_text', 'N/A')}")
                 if 'nutriscore_grade' in p:
-                    st.plotly_chart(generate_nutri_score_viz(p['nutriscore_grade']))
+                    st.plotly_chart(nutri_score_gauge(p['nutriscore_grade'], theme="classic"))
         else: st.error("Product not found.")
 
 elif menu == "Quick Ask":
     st.title("⚡ Quick Ingredient Analysis")
     txt = st.text_area("Paste ingredients here:")
     if st.button("Analyze Now"):
-        if "sugar" in txt.lower(): st.error("⚠️ High Sugar detected.")
-        if "sodium" in txt.lower(): st.warning("🧂 High Sodium detected.")
+        analysis = analyze_ingredients(txt, st.session_state.profile["allergies"])
+        for warning in analysis["warnings"]: st.warning(warning)
         st.success("Analysis complete. See Chat for details.")
 
 elif menu == "My Profile":
     st.title("👤 User Profile")
     st.session_state.profile["goals"] = st.text_area("Health Goals", st.session_state.profile["goals"])
-    st.session_state.profile["allergies"] = st.multiselect("Allergies", ["Peanuts", "Dairy", "Gluten", "Soy", "Eggs"], default=st.session_state.profile["allergies"])
+    st.session_state.profile["allergies"] = st.multiselect("Allergies", list(ALLERGEN_LEXICON), default=st.session_state.profile["allergies"])
     if st.button("Update Profile"): st.success("Profile Saved!")
 
 elif menu == "Add Ingredient":
@@ -334,8 +288,8 @@ elif menu == "Add Ingredient":
     with st.form("add_form"):
         name = st.text_input("Name")
         cals = st.number_input("Calories", 0)
-        if st.form_submit_button("Save"):
-            st.session_state.custom_ingredients.append({"name": name, "calories": cals})
+        if st.form_submit_button("Save") and name:
+            get_custom_store().add({"name": name, "calories": cals})
             st.success("Added to local storage!")
 
 elif menu == "History":
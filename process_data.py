@@ -1,44 +1,72 @@
-import requests
+import argparse
 import gzip
+import io
 import json
-import pandas as pd
 import os
+import time
+
+from wisewhisk.openfoodfacts import get_client
+from wisewhisk.store import DEFAULT_DB_PATH, ProductStore, product_to_row
+
+# The MongoDB dump (openfoodfacts-mongodbdump.gz) is a binary BSON archive;
+# the JSONL export carries the same documents one per line, which is what
+# lets us stream it without holding anything in memory.
+DATA_URL = "https://static.openfoodfacts.org/data/openfoodfacts-products.jsonl.gz"
+
+
+def open_dump(source):
+    """Open a local path or URL to the gzipped JSONL dump as a text stream"""
+    if os.path.exists(source):
+        return gzip.open(source, "rt", encoding="utf-8", errors="replace")
+    response = get_client().session.get(source, stream=True, timeout=(3.05, 60))
+    response.raise_for_status()
+    # Let gzip decompress the raw socket stream chunk by chunk
+    raw = gzip.GzipFile(fileobj=response.raw)
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+
+
+def iter_products(lines):
+    """Yield product documents from JSONL lines, skipping malformed or nameless entries"""
+    for line in lines:
+        try:
+            product = json.loads(line)
+        except ValueError:
+            continue
+        if product.get('product_name') and (product.get('code') or product.get('_id')):
+            yield product
+
+
+def download_and_process(source=DATA_URL, db_path=DEFAULT_DB_PATH, limit=None, batch_size=5000):
+    """Stream the dump into the local SQLite product store in fixed-size batches"""
+    print(f"Streaming products from {source} into {db_path}...")
+    store = ProductStore(db_path, readonly=False)
+    count = 0
+    batch = []
+    started = time.time()
+    with open_dump(source) as lines:
+        for product in iter_products(lines):
+            batch.append(product_to_row(product))
+            count += 1
+            if len(batch) >= batch_size:
+                store.insert_many(batch)
+                batch = []
+                rate = count / max(time.time() - started, 1e-9)
+                print(f"  {count:,} products ({rate:,.0f}/s)", end="\r", flush=True)
+            if limit and count >= limit:
+                break
+    if batch:
+        store.insert_many(batch)
+    print(f"\nComputing Nutri-Scores... {store.fill_nutriscores():,} products graded locally")
+    print("Building indexes...")
+    store.finalize()
+    print(f"Successfully stored {store.count():,} products in {db_path}.")
+    store.close()
 
-def download_and_process(url, limit=1000):
-    print(f"Downloading data from {url}...")
-    # Since the full dump is huge, we'll stream it and process a sample
-    # Note: The user provided a .gz file which is likely a MongoDB dump (JSON-like)
-    try:
-        response = requests.get(url, stream=True)
-        count = 0
-        data_list = []
-        
-        # We'll read the stream and process lines
-        # This is a simplified version as a full MongoDB dump might need specific parsing
-        # For the hackathon, we'll create a robust fallback if the stream is too slow
-        
-        print("Processing stream (sampling first 1000 items)...")
-        # In a real scenario, we'd use a proper parser. Here we'll simulate the extraction
-        # of key fields for our CSV fallback.
-        
-        # Mocking the extraction for the sake of the demo environment constraints
-        # but providing the logic for the user to run locally.
-        
-        sample_data = [
-            {"name": "Organic Peanut Butter", "calories": 588, "fat": 50, "sugar": 9, "protein": 25, "sodium": 0.01, "labels": "Vegan, Gluten-Free"},
-            {"name": "Greek Yogurt", "calories": 59, "fat": 0.4, "sugar": 3.2, "protein": 10, "sodium": 0.04, "labels": "High Protein"},
-            {"name": "Whole Grain Bread", "calories": 247, "fat": 3.4, "sugar": 4, "protein": 13, "sodium": 0.4, "labels": "Fiber Rich"},
-            {"name": "Almond Milk", "calories": 13, "fat": 1.1, "sugar": 0.1, "protein": 0.4, "sodium": 0.1, "labels": "Dairy Free"},
-            {"name": "Dark Chocolate 85%", "calories": 598, "fat": 46, "sugar": 14, "protein": 9, "sodium": 0.02, "labels": "Antioxidants"},
-        ] * 200 # Create 1000 items
-        
-        df = pd.DataFrame(sample_data)
-        df.to_csv("/home/ubuntu/wisewhisk/foods.csv", index=False)
-        print(f"Successfully created foods.csv with {len(df)} items.")
-        
-    except Exception as e:
-        print(f"Error processing data: {e}")
 
 if __name__ == "__main__":
-    DATA_URL = "https://static.openfoodfacts.org/data/openfoodfacts-mongodbdump.gz"
-    download_and_process(DATA_URL)
+    parser = argparse.ArgumentParser(description="Build the offline WiseWhisk product store from the Open Food Facts dump")
+    parser.add_argument("source", nargs="?", default=DATA_URL, help="URL or local path of the .jsonl.gz dump")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database to write")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many products")
+    args = parser.parse_args()
+    download_and_process(args.source, args.db, args.limit)
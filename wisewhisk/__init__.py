@@ -0,0 +1,39 @@
+"""WiseWhisk analysis engine.
+
+Everything here is importable without Streamlit; the apps
+(``app.py``, ``wisewhisk_complete.py``, ``wisewhisk_grok.py``) are thin
+UIs over it, and batch jobs or services can use it directly.
+"""
+from wisewhisk.additives import DEFAULT_INDEX as ADDITIVE_INDEX
+from wisewhisk.allergens import ALLERGEN_LEXICON, check_allergens
+from wisewhisk.analysis import analyze_ingredients, analyze_product, infer_intent, parse_ingredient_list
+from wisewhisk.ingredients import parse_ingredients
+from wisewhisk.intent import classify_intent
+from wisewhisk.nutriscore import compute_nutriscore, compute_nutriscores
+from wisewhisk.openfoodfacts import fetch_open_food_facts, lookup_products, search_open_food_facts, search_products
+from wisewhisk.product import Product
+from wisewhisk.queries import parse_comparison, product_mention
+from wisewhisk.scoring import calculate_health_score, calculate_health_scores
+
+__all__ = [
+    "ADDITIVE_INDEX",
+    "ALLERGEN_LEXICON",
+    "analyze_ingredients",
+    "analyze_product",
+    "calculate_health_score",
+    "calculate_health_scores",
+    "check_allergens",
+    "classify_intent",
+    "compute_nutriscore",
+    "compute_nutriscores",
+    "fetch_open_food_facts",
+    "infer_intent",
+    "lookup_products",
+    "parse_comparison",
+    "parse_ingredient_list",
+    "parse_ingredients",
+    "product_mention",
+    "Product",
+    "search_open_food_facts",
+    "search_products",
+]
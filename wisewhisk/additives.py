@@ -0,0 +1,125 @@
+"""Additive knowledge base: E-numbers, synonyms, risk class and diet status.
+
+The table ships as ``data/additives.csv`` and is loaded once into a hash
+index keyed by E-code and by every normalized name and synonym. Annotating
+an ingredient is a handful of dict lookups over its word n-grams, never a
+scan of the table.
+"""
+import csv
+import re
+from pathlib import Path
+
+from wisewhisk.ingredients import iter_nodes
+
+ADDITIVES_CSV = Path(__file__).parent / "data" / "additives.csv"
+MAX_NGRAM = 4
+WORD_RE = re.compile(r"[^\W_]+")
+E_CODE_RE = re.compile(r"^e(\d{3,4}[a-j]?)$")
+
+
+def normalize_name(text):
+    """Lower-case words joined by single spaces, punctuation dropped"""
+    return " ".join(WORD_RE.findall(str(text).lower()))
+
+
+def load_additives(path=ADDITIVES_CSV):
+    """Rows of the additive table as dicts"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {
+                "code": row["code"] or None,
+                "name": row["name"],
+                "synonyms": tuple(s for s in row["synonyms"].split("|") if s),
+                "category": row["category"],
+                "risk": row["risk"],
+                "vegan": row["vegan"],
+                "halal": row["halal"],
+                "flag": row["flag"] or None,
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+class AdditiveIndex:
+    """Hash index over additive entries by E-code and normalized name"""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self._by_id = {}
+        self._by_code = {}
+        self._by_name = {}
+        for entry in self.entries:
+            self._by_id[entry_id(entry)] = entry
+            if entry["code"]:
+                self._by_code[entry["code"].upper()] = entry
+            for name in (entry["name"], *entry["synonyms"]):
+                self._by_name.setdefault(normalize_name(name), entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, additive_id):
+        """Entry for an id as returned by :meth:`annotate`"""
+        return self._by_id.get(additive_id)
+
+    def by_code(self, code):
+        """Entry for an E-number such as ``"E322"`` or ``"e150a"``"""
+        code = str(code).upper().replace(" ", "").replace("-", "")
+        return self._by_code.get(code) or self._by_code.get(code.rstrip("ABCDEFGHIJ"))
+
+    def lookup(self, text):
+        """Entry for an exact name, synonym or E-code, or None"""
+        key = normalize_name(text)
+        entry = self._by_name.get(key)
+        if entry is None:
+            code = E_CODE_RE.match(key.replace(" ", ""))
+            if code:
+                entry = self.by_code("E" + code.group(1))
+        return entry
+
+    def match(self, name, e_number=None):
+        """Entries named in one ingredient, longest phrase first, left to right"""
+        found = []
+        if e_number:
+            entry = self.by_code(e_number)
+            if entry:
+                found.append(entry)
+        words = normalize_name(name).split()
+        i = 0
+        while i < len(words):
+            for n in range(min(MAX_NGRAM, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + n])
+                entry = self._by_name.get(phrase)
+                if entry is None and n == 1:
+                    code = E_CODE_RE.match(phrase)
+                    entry = self.by_code("E" + code.group(1)) if code else None
+                if entry is not None:
+                    if entry not in found:
+                        found.append(entry)
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def annotate(self, parsed):
+        """Attach matching entry ids to every node of an ingredient parse.
+
+        Each node gets an ``"additives"`` list (E-code, or name for entries
+        without one); the return value is every ``(node, entry)`` match in
+        label order.
+        """
+        matches = []
+        for part in ("ingredients", "contains", "may_contain"):
+            for node in iter_nodes(parsed[part]):
+                entries = self.match(node["name"], node.get("e_number"))
+                node["additives"] = [entry_id(e) for e in entries]
+                matches.extend((node, e) for e in entries)
+        return matches
+
+
+def entry_id(entry):
+    return entry["code"] or entry["name"]
+
+
+DEFAULT_INDEX = AdditiveIndex(load_additives())
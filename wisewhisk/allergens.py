@@ -0,0 +1,97 @@
+from collections import deque
+
+# Allergen -> keywords that reveal it in an ingredient list. Matching is by
+# substring, so "butter" also catches "peanut butter" and "buttermilk".
+ALLERGEN_LEXICON = {
+    "Peanuts": ["peanut", "groundnut"],
+    "Dairy": ["milk", "cheese", "butter", "cream", "whey", "casein", "lactose"],
+    "Gluten": ["wheat", "barley", "rye", "gluten"],
+    "Soy": ["soy", "soybean", "tofu"],
+    "Eggs": ["egg", "albumin"],
+    "Shellfish": ["shellfish", "shrimp", "prawn", "crab", "lobster"],
+    "Tree Nuts": ["tree nuts", "almond", "cashew", "hazelnut", "walnut", "pecan", "pistachio", "macadamia"],
+    "Fish": ["fish", "anchovy", "salmon", "tuna", "cod"],
+}
+
+
+class AllergenMatcher:
+    """Aho–Corasick automaton over an allergen lexicon.
+
+    Built once; ``scan`` then finds every keyword occurrence (overlaps
+    included) in a single left-to-right pass over the text, no matter how
+    many keywords the lexicon holds.
+    """
+
+    def __init__(self, lexicon=ALLERGEN_LEXICON):
+        self.lexicon = {allergen: list(keywords) for allergen, keywords in lexicon.items()}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for allergen, keywords in self.lexicon.items():
+            for keyword in keywords:
+                self._insert(keyword.lower(), allergen)
+        self._link()
+
+    def _insert(self, keyword, allergen):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append((keyword, allergen))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """Return ``(start, end, keyword, allergen)`` for every hit in ``text``"""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        state = 0
+        for i, ch in enumerate(str(text).lower()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for keyword, allergen in out[state]:
+                    hits.append((i + 1 - len(keyword), i + 1, keyword, allergen))
+        return hits
+
+    def allergens_in(self, text):
+        """Set of allergens with at least one hit in ``text``"""
+        return {hit[3] for hit in self.scan(text)}
+
+
+DEFAULT_MATCHER = AllergenMatcher()
+
+
+def check_allergens(ingredients, user_allergies, matcher=DEFAULT_MATCHER):
+    """Check if any allergens are present"""
+    if not user_allergies:
+        return []
+    if isinstance(ingredients, str):
+        text = ingredients.lower()
+    else:
+        # Newlines keep keywords from matching across two ingredients
+        text = "\n".join(str(ing) for ing in ingredients).lower()
+    found = matcher.allergens_in(text)
+    detected = []
+    for allergen in user_allergies:
+        # Allergens outside the lexicon fall back to their own name as the keyword
+        if allergen in found or (allergen not in matcher.lexicon and allergen.lower() in text):
+            detected.append(allergen)
+    return detected
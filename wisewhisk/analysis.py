@@ -0,0 +1,79 @@
+"""Streamlit-free analysis core shared by the apps, batch jobs and the API"""
+from wisewhisk.additives import DEFAULT_INDEX, entry_id, normalize_name
+from wisewhisk.allergens import check_allergens
+from wisewhisk.ingredients import flatten_ingredients, parse_ingredients
+from wisewhisk.intent import DEFAULT_CLASSIFIER
+from wisewhisk.nutriscore import product_nutriscore_grade
+from wisewhisk.scoring import calculate_health_score
+
+# Quick Ask red flags, keyed by the additive table's "flag" column. Matching is by
+# table name or synonym, so "natural flavour" and "unsalted" no longer raise flags
+# the way the old substring checks did. "sodium ..." compounds flag sodium even when a
+# longer row without the flag wins ("sodium carboxymethyl cellulose" -> E466).
+FLAG_WARNINGS = {
+    "sugar": "⚠️ **High Sugar** detected - May spike blood glucose levels",
+    "sodium": "🧂 **High Sodium** detected - Monitor if you have blood pressure concerns",
+    "artificial": "🧪 **Artificial ingredients** detected - Consider natural alternatives",
+    "palm_oil": "🌴 **Palm Oil** detected - Environmental and health concerns",
+}
+
+HIGH_SUGAR_100G = 15
+HIGH_SODIUM_100G = 0.5
+
+
+def parse_ingredient_list(raw_text):
+    """Parse raw ingredient list into a flat list of ingredient names.
+
+    Sub-ingredients follow the ingredient they belong to, and "contains" /
+    "may contain" declarations are included; see
+    :func:`wisewhisk.ingredients.parse_ingredients` for the full tree.
+    """
+    return flatten_ingredients(parse_ingredients(raw_text))
+
+
+def infer_intent(query):
+    """Infer user intent from query"""
+    return DEFAULT_CLASSIFIER.predict(query)
+
+
+def ingredient_warnings(matches):
+    """Quick Ask health warnings for the additive matches of a parsed label"""
+    flags = {entry['flag'] for _, entry in matches}
+    if any("sodium" in normalize_name(node['name']).split() for node, _ in matches):
+        flags.add("sodium")
+    return [message for flag, message in FLAG_WARNINGS.items() if flag in flags]
+
+
+def _additive_ids(matches):
+    return list(dict.fromkeys(entry_id(entry) for _, entry in matches))
+
+
+def analyze_ingredients(raw_text, allergies=()):
+    """Full Quick Ask analysis of a pasted ingredient list"""
+    parsed = parse_ingredients(raw_text)
+    matches = DEFAULT_INDEX.annotate(parsed)
+    ingredients = flatten_ingredients(parsed)
+    warnings = ingredient_warnings(matches)
+    allergens = check_allergens(ingredients, list(allergies))
+    if allergens:
+        warnings.append(f"🚨 **ALLERGEN ALERT**: Contains {', '.join(allergens)}")
+    return {"ingredients": ingredients, "allergens": allergens, "warnings": warnings,
+            "additives": _additive_ids(matches)}
+
+
+def analyze_product(product, allergies=()):
+    """Safety verdict for an OFF product dict against a user's allergies"""
+    nutriments = product.get('nutriments') or {}
+    parsed = parse_ingredients(product.get('ingredients_text') or '')
+    ingredients = flatten_ingredients(parsed)
+    return {
+        "product_name": product.get('product_name'),
+        "code": product.get('code'),
+        "ingredients": ingredients,
+        "allergens": check_allergens(ingredients, list(allergies)),
+        "additives": _additive_ids(DEFAULT_INDEX.annotate(parsed)),
+        "health_score": calculate_health_score(nutriments),
+        "nutriscore_grade": product_nutriscore_grade(product),
+        "high_sugar": nutriments.get('sugars_100g', 0) > HIGH_SUGAR_100G,
+        "high_sodium": nutriments.get('sodium_100g', 0) > HIGH_SODIUM_100G,
+    }
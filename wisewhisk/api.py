@@ -0,0 +1,252 @@
+"""JSON HTTP API over the analysis engine.
+
+Run with several worker processes, e.g.::
+
+    uvicorn wisewhisk.api:app --workers 4
+
+Workers share the on-disk Open Food Facts response cache and open the
+product store read-only with SQLite memory-mapped I/O, so the OS page
+cache holds a single copy of it for all of them.
+
+Batch endpoints take ``{"items": [...]}`` and answer with one JSON
+document, or stream NDJSON lines as items complete when the client sends
+``Accept: application/x-ndjson``.
+"""
+import asyncio
+import json
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json is fine, just slower
+    orjson = None
+
+from wisewhisk.allergens import check_allergens
+from wisewhisk.analysis import analyze_ingredients, analyze_product, parse_ingredient_list
+from wisewhisk.openfoodfacts import fetch_open_food_facts, lookup_product, lookup_products, search_products
+from wisewhisk.product import Nutriments, Product
+from wisewhisk.queries import parse_comparison
+
+MAX_BATCH = 500
+MAX_SEARCH_RESULTS = 50
+NDJSON = "application/x-ndjson"
+
+
+def _default(value):
+    if isinstance(value, (Product, Nutriments)):
+        return value.to_dict()
+    return str(value)
+
+
+def _dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return _dumps(content)
+
+
+class APIError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def _body(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        raise APIError(400, "Request body must be JSON")
+    if not isinstance(data, dict):
+        raise APIError(400, "Request body must be a JSON object")
+    return data
+
+
+def _allergies(data):
+    allergies = data.get("allergies") or []
+    if not isinstance(allergies, list) or not all(isinstance(a, str) for a in allergies):
+        raise APIError(400, "'allergies' must be a list of strings")
+    return allergies
+
+
+def _items(data):
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        raise APIError(400, "'items' must be a non-empty list")
+    if len(items) > MAX_BATCH:
+        raise APIError(413, f"At most {MAX_BATCH} items per batch")
+    return items
+
+
+# --- Single-item handlers (blocking; run in the thread pool) ---
+def _product(barcode, allergies=()):
+    data = fetch_open_food_facts(barcode)
+    if not data:
+        return None
+    product = data['product']
+    return {"product": product, "analysis": analyze_product(product, allergies)}
+
+
+def _analyze(item):
+    if not isinstance(item, dict) or not isinstance(item.get("ingredients"), str):
+        return {"error": "each item needs an 'ingredients' string"}
+    try:
+        return analyze_ingredients(item["ingredients"], _allergies(item))
+    except APIError as exc:
+        return {"error": exc.detail}
+
+
+def _allergen_check(data):
+    allergies = _allergies(data)
+    if data.get("barcode"):
+        result = fetch_open_food_facts(str(data["barcode"]))
+        if not result:
+            raise APIError(404, "Product not found")
+        text = result['product'].get('ingredients_text') or ''
+    elif isinstance(data.get("ingredients"), str):
+        text = data["ingredients"]
+    else:
+        raise APIError(400, "Send either 'barcode' or an 'ingredients' string")
+    ingredients = parse_ingredient_list(text)
+    allergens = check_allergens(ingredients, allergies)
+    return {"ingredients": ingredients, "allergens": allergens, "safe": not allergens}
+
+
+def _compare(items, allergies):
+    products = lookup_products(items)
+    results = []
+    for query, product in zip(items, products):
+        results.append({
+            "query": query,
+            "product": product,
+            "analysis": analyze_product(product, allergies) if product else None,
+        })
+    scored = [r for r in results if r["analysis"]]
+    best = max(scored, key=lambda r: r["analysis"]["health_score"]) if scored else None
+    return {"results": results, "best": best["query"] if best else None}
+
+
+# --- Streaming ---
+async def _run_batch(request, func, items):
+    """Answer a batch as one JSON document, or as NDJSON lines in completion order"""
+    if NDJSON not in request.headers.get("accept", ""):
+        results = await asyncio.gather(*(run_in_threadpool(func, item) for item in items))
+        return FastJSONResponse({"results": list(results)})
+
+    async def stream():
+        async def run(index, item):
+            return index, await run_in_threadpool(func, item)
+
+        for next_done in asyncio.as_completed([run(i, item) for i, item in enumerate(items)]):
+            index, result = await next_done
+            yield _dumps({"index": index, "result": result}) + b"\n"
+
+    return StreamingResponse(stream(), media_type=NDJSON)
+
+
+# --- Endpoints ---
+async def health(request):
+    return FastJSONResponse({"status": "ok"})
+
+
+async def product(request):
+    result = await run_in_threadpool(_product, request.path_params["barcode"])
+    if result is None:
+        raise APIError(404, "Product not found")
+    return FastJSONResponse(result)
+
+
+async def search(request):
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        raise APIError(400, "Missing 'q' query parameter")
+    try:
+        k = int(request.query_params.get("k", 10))
+        page = int(request.query_params.get("page", 1))
+    except ValueError:
+        raise APIError(400, "'k' and 'page' must be integers")
+    if not 1 <= k <= MAX_SEARCH_RESULTS or page < 1:
+        raise APIError(400, f"'k' must be 1-{MAX_SEARCH_RESULTS} and 'page' at least 1")
+    result = await run_in_threadpool(search_products, query, k, page)
+    if not result["products"]:
+        raise APIError(404, "No matching product")
+    return FastJSONResponse(result)
+
+
+async def compare(request):
+    data = await _body(request)
+    if isinstance(data.get("query"), str):
+        items = [m["name"] for m in parse_comparison(data["query"])][:MAX_BATCH]
+    else:
+        items = [str(i) for i in _items(data)]
+    if len(items) < 2:
+        raise APIError(400, "Name at least two products to compare")
+    return FastJSONResponse(await run_in_threadpool(_compare, items, _allergies(data)))
+
+
+async def analyze(request):
+    data = await _body(request)
+    if not isinstance(data.get("ingredients"), str):
+        raise APIError(400, "'ingredients' must be a string")
+    return FastJSONResponse(await run_in_threadpool(analyze_ingredients, data["ingredients"], _allergies(data)))
+
+
+async def allergens(request):
+    data = await _body(request)
+    return FastJSONResponse(await run_in_threadpool(_allergen_check, data))
+
+
+async def batch_products(request):
+    data = await _body(request)
+    allergies = _allergies(data)
+
+    def resolve(query):
+        found = lookup_product(str(query))
+        return {"query": query, "product": found,
+                "analysis": analyze_product(found, allergies) if found else None}
+
+    return await _run_batch(request, resolve, _items(data))
+
+
+async def batch_analyze(request):
+    data = await _body(request)
+    return await _run_batch(request, _analyze, _items(data))
+
+
+async def api_error(request, exc):
+    return FastJSONResponse({"error": exc.detail}, status_code=exc.status_code)
+
+
+routes = [
+    Route("/health", health),
+    Route("/products/{barcode}", product),
+    Route("/search", search),
+    Route("/compare", compare, methods=["POST"]),
+    Route("/analyze", analyze, methods=["POST"]),
+    Route("/allergens", allergens, methods=["POST"]),
+    Route("/batch/products", batch_products, methods=["POST"]),
+    Route("/batch/analyze", batch_analyze, methods=["POST"]),
+]
+
+app = Starlette(routes=routes, exception_handlers={APIError: api_error})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the WiseWhisk JSON API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run("wisewhisk.api:app", host=args.host, port=args.port, workers=args.workers)
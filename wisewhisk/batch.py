@@ -0,0 +1,286 @@
+"""Batch analysis of whole catalogs from the command line.
+
+Reads barcodes and/or ingredient texts from CSV or JSONL and writes one
+verdict per input row, in input order, as JSONL (or CSV/Parquet, picked
+from the output extension or ``--format``)::
+
+    python -m wisewhisk.batch supplier_feed.csv -o verdicts.jsonl --allergies Peanuts,Dairy
+
+Input rows may carry ``barcode`` (or ``code``), ``ingredients`` (or
+``ingredients_text``) and an optional per-row ``allergies`` list; a JSONL
+line that is a bare string or number is taken as a barcode or an
+ingredient text. Unreadable rows get an ``error`` verdict. Work is
+spread over a process pool with a bounded number of chunks in flight, so
+memory stays flat for any input size. A checkpoint file next to the
+output records how far the output is complete; ``--resume`` continues
+from there after an interruption.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - only Parquet output needs it
+    pa = None
+
+from wisewhisk.analysis import analyze_ingredients, analyze_product
+from wisewhisk.export import EXPORT_FORMATS, chunked, format_for_path, iter_export, iter_jsonl
+from wisewhisk.openfoodfacts import fetch_open_food_facts, is_barcode
+
+BARCODE_FIELDS = ("barcode", "code", "ean")
+INGREDIENT_FIELDS = ("ingredients", "ingredients_text")
+# Set on rows that couldn't be read; they come out as error verdicts
+INPUT_ERROR = "_input_error"
+
+# Columns of CSV and Parquet output; JSONL keeps every key
+OUTPUT_COLUMNS = ["row", "barcode", "found", "product_name", "code", "health_score", "nutriscore_grade",
+                  "high_sugar", "high_sodium", "allergens", "additives", "warnings", "ingredients", "error"]
+_LIST_COLUMNS = ("allergens", "additives", "warnings", "ingredients")
+
+
+def output_schema():
+    """Arrow schema for Parquet output, so columns don't depend on which rows come first"""
+    types = {"row": pa.int64(), "found": pa.bool_(), "health_score": pa.int64(),
+             "high_sugar": pa.bool_(), "high_sodium": pa.bool_()}
+    return pa.schema([
+        (name, pa.list_(pa.string()) if name in _LIST_COLUMNS else types.get(name, pa.string()))
+        for name in OUTPUT_COLUMNS
+    ])
+
+
+# --- Input ---
+def as_record(value):
+    """Input row as a dict; a bare string or number is a barcode or an ingredient text"""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, (str, int)) and not isinstance(value, bool):
+        text = str(value).strip()
+        return {"barcode": text} if is_barcode(text) else {"ingredients": text}
+    return {INPUT_ERROR: f"unsupported row of type {type(value).__name__}"}
+
+
+def read_records(path):
+    """Yield input rows as dicts from a CSV or JSONL file (``-`` for stdin JSONL)"""
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(stream)
+        else:
+            for number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield as_record(json.loads(line))
+                except ValueError as exc:
+                    yield {INPUT_ERROR: f"line {number}: invalid JSON ({exc})"}
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _field(record, names):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    return None
+
+
+def _split_allergies(value):
+    if isinstance(value, list):
+        return [str(a).strip() for a in value if str(a).strip()]
+    return [a.strip() for a in str(value).replace(";", ",").split(",") if a.strip()]
+
+
+# --- Work (runs in the pool) ---
+def analyze_record(record, default_allergies=()):
+    """Verdict for one input row; problems are reported in its ``error`` field, never raised"""
+    result = {"barcode": None, "found": False}
+    try:
+        record = as_record(record)
+        if INPUT_ERROR in record:
+            result["error"] = record[INPUT_ERROR]
+            return result
+        allergies = default_allergies
+        if record.get("allergies"):
+            allergies = _split_allergies(record["allergies"])
+        barcode = _field(record, BARCODE_FIELDS)
+        text = _field(record, INGREDIENT_FIELDS)
+        result["barcode"] = barcode
+        if barcode:
+            data = fetch_open_food_facts(barcode)
+            if data:
+                verdict = analyze_product(data['product'], allergies)
+                result.update(verdict, found=True)
+                text = None
+        if text:
+            result.update(analyze_ingredients(text, allergies), found=True)
+        if not barcode and not text:
+            result["error"] = "row has neither a barcode nor ingredients"
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def analyze_chunk(chunk, default_allergies):
+    return [analyze_record(record, default_allergies) for record in chunk]
+
+
+# --- Checkpointing ---
+def _checkpoint_path(output):
+    return output + ".ckpt"
+
+
+def load_checkpoint(output):
+    try:
+        with open(_checkpoint_path(output), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"rows": 0, "offset": 0}
+
+
+def save_checkpoint(output, rows, offset):
+    tmp = _checkpoint_path(output) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"rows": rows, "offset": offset}, f)
+    os.replace(tmp, _checkpoint_path(output))
+
+
+# --- Driver ---
+def iter_verdicts(records, allergies=(), workers=None, chunk_size=200, max_in_flight=None):
+    """Yield lists of verdicts, one per input chunk, in input order"""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = chunked(records, chunk_size)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.append(pool.submit(analyze_chunk, chunk, tuple(allergies)))
+            if not pending:
+                break
+            yield pending.popleft().result()
+
+
+class _Progress:
+    def __init__(self, start_row, every):
+        self.start_row = self.row = start_row
+        self.every = every
+        self.started = self.last_report = time.time()
+
+    def report(self):
+        now = time.time()
+        if now - self.last_report >= self.every:
+            done = self.row - self.start_row
+            print(f"{self.row:,} rows  ({done / (now - self.started):,.0f} rows/s)", file=sys.stderr)
+            self.last_report = now
+
+    def finish(self):
+        done = self.row - self.start_row
+        elapsed = max(time.time() - self.started, 1e-9)
+        print(f"Done: {done:,} rows in {elapsed:.1f}s ({done / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+
+def _numbered(chunks, progress):
+    for results in chunks:
+        for result in results:
+            result["row"] = progress.row
+            progress.row += 1
+            yield result
+        progress.report()
+
+
+def run_batch(input_path, output="-", allergies=(), workers=None, chunk_size=200,
+              max_in_flight=None, resume=False, progress_every=2.0, fmt="jsonl"):
+    """Analyze every row of ``input_path`` and stream verdicts to ``output``.
+
+    JSONL output is checkpointed and can be resumed; CSV and Parquet are
+    written through :mod:`wisewhisk.export` in one pass.
+    """
+    if fmt != "jsonl":
+        if resume:
+            raise ValueError("--resume is only supported for JSONL output")
+        progress = _Progress(0, progress_every)
+        chunks = iter_verdicts(read_records(input_path), allergies, workers, chunk_size, max_in_flight)
+        options = {"fieldnames": OUTPUT_COLUMNS} if fmt == "csv" else {}
+        if fmt == "parquet" and pa is not None:
+            options = {"schema": output_schema()}
+        out = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for data in iter_export(_numbered(chunks, progress), fmt, **options):
+                out.write(data)
+        finally:
+            if output != "-":
+                out.close()
+        progress.finish()
+        return progress.row
+
+    start_row, offset = 0, 0
+    if resume and output != "-":
+        checkpoint = load_checkpoint(output)
+        # A checkpoint past the end of the output (or without one) has nothing to resume from
+        if os.path.exists(output) and os.path.getsize(output) >= checkpoint["offset"]:
+            start_row, offset = checkpoint["rows"], checkpoint["offset"]
+        elif checkpoint["rows"]:
+            print(f"{output} is missing or shorter than its checkpoint; starting from row 0", file=sys.stderr)
+
+    if output == "-":
+        out = sys.stdout.buffer
+    else:
+        out = open(output, "r+b" if offset else "wb")
+        # Drop anything written after the last checkpoint (a half-finished chunk)
+        out.seek(offset)
+        out.truncate()
+
+    records = islice(read_records(input_path), start_row, None)
+    progress = _Progress(start_row, progress_every)
+    try:
+        for results in iter_verdicts(records, allergies, workers, chunk_size, max_in_flight):
+            # Written strictly in input order so the checkpoint is a single row count
+            for data in iter_jsonl(_numbered([results], progress), chunk_size=len(results)):
+                out.write(data)
+            out.flush()
+            if output != "-":
+                save_checkpoint(output, progress.row, out.tell())
+    finally:
+        if output != "-":
+            out.close()
+    progress.finish()
+    return progress.row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Allergen and health-score verdicts for a whole product feed")
+    parser.add_argument("input", help="CSV or JSONL file of barcodes and/or ingredient texts ('-' for JSONL on stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default=None,
+                        help="Output format (default: from the output extension, else jsonl)")
+    parser.add_argument("--allergies", default="", help="Comma-separated allergies applied to every row")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Rows per task sent to a worker")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint")
+    args = parser.parse_args(argv)
+    fmt = args.format or format_for_path(args.output)
+    if args.resume and args.output == "-":
+        parser.error("--resume needs --output")
+    if args.resume and fmt != "jsonl":
+        parser.error("--resume is only supported for JSONL output")
+    run_batch(args.input, args.output, _split_allergies(args.allergies), args.workers,
+              args.chunk_size, resume=args.resume, fmt=fmt)
+
+
+if __name__ == "__main__":
+    main()
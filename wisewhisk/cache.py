@@ -0,0 +1,244 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from wisewhisk.connections import ThreadLocalConnection
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WISEWHISK_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "wisewhisk"),
+)
+SHARED_CACHE_FILE = "cache.db"
+
+_MISSING = object()
+
+
+class SharedCache(ThreadLocalConnection):
+    """Key/value store shared by every process on the host.
+
+    Backed by one SQLite database in WAL mode: readers in other processes
+    (Streamlit replicas, API workers) are never blocked by a writer, and
+    each ``set`` is a single transaction, so nobody sees a half-written
+    value. Once the table holds more than ``max_entries`` rows or
+    ``max_bytes`` of values, the oldest entries are evicted.
+    Database errors (locked, full disk, ...) are treated as misses.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        stored_at REAL NOT NULL,
+        size INTEGER NOT NULL,
+        value TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at);
+    """
+
+    def __init__(self, path, max_entries=50000, max_bytes=256 << 20, prune_every=256, timeout=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self.timeout = timeout
+        self._writes = 0
+        super().__init__()
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def get(self, key):
+        """``(text, stored_at)`` for ``key``, or None"""
+        try:
+            return self.conn.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+
+    def set(self, key, text, stored_at):
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, stored_at, size, value) VALUES (?, ?, ?, ?)",
+                (key, stored_at, len(text), text),
+            )
+        except sqlite3.Error:
+            return
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Evict the oldest entries beyond the row and byte limits; returns how many"""
+        try:
+            return self.conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, ROW_NUMBER() OVER newest AS n, SUM(size) OVER newest AS total FROM entries"
+                "  WINDOW newest AS (ORDER BY stored_at DESC ROWS UNBOUNDED PRECEDING))"
+                " WHERE n > ? OR total > ?)",
+                (self.max_entries, self.max_bytes),
+            ).rowcount
+        except sqlite3.Error:
+            return 0
+
+    def __len__(self):
+        try:
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+class ResponseCache:
+    """Two-tier (memory + shared disk) response cache with TTLs.
+
+    Lookups are served from an in-memory LRU first, then from the
+    :class:`SharedCache` database in ``directory`` (which every process on
+    the host reads and fills), and only then from the loader. ``None`` results ("not found") are
+    cached too, but with the shorter ``negative_ttl``. Entries past their TTL
+    but still inside ``stale_ttl`` are returned immediately while a background
+    thread refreshes them (stale-while-revalidate).
+
+    ``encode`` is the ``json.dump`` ``default=`` hook for values that aren't
+    plain JSON, and ``decode`` turns a value read back from disk into what
+    the loader would have returned; the memory tier keeps loader values as-is.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=2048, max_disk_entries=50000,
+                 max_disk_bytes=256 << 20, ttl=24 * 3600, negative_ttl=3600, stale_ttl=6 * 3600,
+                 encode=None, decode=None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.encode = encode
+        self.decode = decode
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._disk = None
+        if directory:
+            self._disk = SharedCache(os.path.join(directory, SHARED_CACHE_FILE),
+                                     max_entries=max_disk_entries, max_bytes=max_disk_bytes)
+
+    # --- Memory tier ---
+    def _remember(self, key, value, stored_at):
+        with self._lock:
+            self._memory[key] = (value, stored_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _recall(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    # --- Disk tier ---
+    def _read_disk(self, key):
+        if self._disk is None:
+            return None
+        row = self._disk.get(key)
+        if row is None:
+            return None
+        try:
+            value = json.loads(row[0])
+        except ValueError:
+            return None
+        if self.decode is not None:
+            value = self.decode(value)
+        return value, row[1]
+
+    def _write_disk(self, key, value, stored_at):
+        if self._disk is None:
+            return
+        try:
+            text = json.dumps(value, default=self.encode)
+        except (TypeError, ValueError):
+            return
+        self._disk.set(key, text, stored_at)
+
+    # --- Public API ---
+    def _ttl_for(self, value):
+        return self.negative_ttl if value is None else self.ttl
+
+    def get(self, key, default=None):
+        """Return a cached value that is still fresh, ignoring stale entries"""
+        entry = self._lookup(key)
+        if entry is None:
+            return default
+        value, stored_at = entry
+        if time.time() - stored_at > self._ttl_for(value):
+            return default
+        return value
+
+    def set(self, key, value):
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+        self._write_disk(key, value, stored_at)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def _lookup(self, key):
+        entry = self._recall(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, *entry)
+        return entry
+
+    def _load(self, key, loader, fallback=_MISSING):
+        try:
+            value = loader()
+        except Exception:
+            # Transient failures are never cached; keep serving what we had
+            return None if fallback is _MISSING else fallback
+        self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key, loader, stale_value):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._load(key, loader, stale_value)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_or_fetch(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss.
+
+        ``loader`` should return ``None`` for "not found" and raise on
+        transient errors; exceptions are swallowed and yield ``None``.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            ttl = self._ttl_for(value)
+            if age <= ttl:
+                return value
+            if age <= ttl + self.stale_ttl:
+                self._refresh_in_background(key, loader, value)
+                return value
+            return self._load(key, loader, value)
+        return self._load(key, loader)
@@ -0,0 +1,96 @@
+from functools import lru_cache
+
+import plotly.graph_objects as go
+
+NUTRI_SCORE_COLORS = {'A': '#038141', 'B': '#85BB2F', 'C': '#FECB02', 'D': '#EE8100', 'E': '#E63E11'}
+
+
+def _classic_gauge(score):
+    colors = NUTRI_SCORE_COLORS
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = ord('E') - ord(score),
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': f"Nutri-Score: {score}", 'font': {'size': 20, 'color': '#1e5666'}},
+        gauge = {
+            'axis': {'range': [0, 4], 'tickvals': [0, 1, 2, 3, 4], 'ticktext': ['E', 'D', 'C', 'B', 'A']},
+            'bar': {'color': colors.get(score, 'gray')},
+            'steps': [
+                {'range': [0, 0.8], 'color': colors['E']},
+                {'range': [0.8, 1.8], 'color': colors['D']},
+                {'range': [1.8, 2.8], 'color': colors['C']},
+                {'range': [2.8, 3.8], 'color': colors['B']},
+                {'range': [3.8, 4], 'color': colors['A']},
+            ],
+        }
+    ))
+    fig.update_layout(height=220, margin=dict(l=20, r=20, t=50, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+
+def _enhanced_gauge(score):
+    colors = NUTRI_SCORE_COLORS
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=ord('E') - ord(score),
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': f"Nutri-Score: {score}", 'font': {'size': 24, 'color': '#1e5666', 'family': 'Inter'}},
+        gauge={
+            'axis': {'range': [0, 4], 'tickvals': [0, 1, 2, 3, 4], 'ticktext': ['E', 'D', 'C', 'B', 'A']},
+            'bar': {'color': colors.get(score, 'gray'), 'thickness': 0.8},
+            'steps': [
+                {'range': [0, 0.8], 'color': 'rgba(230, 62, 17, 0.3)'},
+                {'range': [0.8, 1.8], 'color': 'rgba(238, 129, 0, 0.3)'},
+                {'range': [1.8, 2.8], 'color': 'rgba(254, 203, 2, 0.3)'},
+                {'range': [2.8, 3.8], 'color': 'rgba(133, 187, 47, 0.3)'},
+                {'range': [3.8, 4], 'color': 'rgba(3, 129, 65, 0.3)'},
+            ],
+            'threshold': {
+                'line': {'color': "white", 'width': 4},
+                'thickness': 0.75,
+                'value': ord('E') - ord(score)
+            }
+        }
+    ))
+
+    fig.update_layout(
+        height=250,
+        margin=dict(l=20, r=20, t=60, b=20),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'family': 'Inter'}
+    )
+
+    return fig
+
+
+GAUGE_THEMES = {
+    "classic": _classic_gauge,
+    "enhanced": _enhanced_gauge,
+}
+
+
+def normalize_grade(score):
+    """Upper-case A-E grade, with anything unrecognised shown as C"""
+    score = str(score or "").upper()
+    return score if score in NUTRI_SCORE_COLORS else 'C'
+
+
+@lru_cache(maxsize=None)
+def _gauge(grade, theme):
+    return GAUGE_THEMES[theme](grade)
+
+
+def nutri_score_gauge(score, theme="enhanced"):
+    """Nutri-Score gauge figure, built once per (grade, theme) and then reused.
+
+    The returned figure is shared between callers; treat it as read-only.
+    """
+    return _gauge(normalize_grade(score), theme)
+
+
+def prerender_gauges(themes=tuple(GAUGE_THEMES)):
+    """Build every gauge up front so the first rerun doesn't pay for it"""
+    for theme in themes:
+        for grade in NUTRI_SCORE_COLORS:
+            _gauge(grade, theme)
@@ -0,0 +1,31 @@
+"""Per-thread SQLite connections for the shared cache and the stores"""
+import os
+import threading
+
+
+class ThreadLocalConnection:
+    """Gives every thread, and every forked process, its own ``conn``.
+
+    Subclasses implement ``connect()`` to open and set up one connection.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def connect(self):
+        raise NotImplementedError
+
+    @property
+    def conn(self):
+        # Connections are per thread and never cross a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self.connect()
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
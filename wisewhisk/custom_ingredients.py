@@ -0,0 +1,190 @@
+"""Durable store for the ingredients users add through the apps.
+
+One SQLite table, shared by every session and process, with a unique index
+on the normalized name. Every write bumps a ``version`` column, so readers
+(the name index here, the apps' tables) pick up only the rows changed since
+they last looked instead of reloading everything. Removed ingredients are
+kept as tombstones so those readers see the removal too.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from wisewhisk.connections import ThreadLocalConnection
+from wisewhisk.foods import FOOD_COLUMNS, NUMERIC_COLUMNS
+from wisewhisk.search import NameIndex
+from wisewhisk.store import as_number, name_key
+
+DEFAULT_CUSTOM_DB_PATH = os.environ.get(
+    "WISEWHISK_CUSTOM_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "custom_ingredients.db"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS custom_ingredients (
+    id INTEGER PRIMARY KEY,
+    name_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    calories REAL,
+    fat REAL,
+    sugar REAL,
+    protein REAL,
+    sodium REAL,
+    labels TEXT,
+    added_at REAL NOT NULL,
+    version INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS custom_ingredients_version ON custom_ingredients (version);
+"""
+
+_NEXT_VERSION = "(SELECT COALESCE(MAX(version), 0) + 1 FROM custom_ingredients)"
+
+
+def split_labels(labels):
+    """``"Vegan, Gluten-Free"`` -> ``["Vegan", "Gluten-Free"]``"""
+    return [label.strip() for label in str(labels or "").split(",") if label.strip()]
+
+
+class CustomIngredientStore(ThreadLocalConnection):
+    """SQLite-backed custom ingredients, searchable like ``foods.csv``.
+
+    Rows come back as dicts with the ``foods.csv`` columns plus ``id``.
+    Each thread gets its own connection; the database runs in WAL mode so
+    sessions reading it never wait on one that is adding an ingredient.
+    """
+
+    def __init__(self, path=DEFAULT_CUSTOM_DB_PATH):
+        self.path = path
+        self._index = NameIndex()
+        self._index_version = 0
+        self._indexed_names = {}
+        self._index_lock = threading.Lock()
+        super().__init__()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Writing ---
+    def add(self, ingredient):
+        """Insert ``ingredient`` (a ``foods.csv``-shaped dict), or update the one with the same name"""
+        key = name_key(ingredient.get("name"))
+        if not key:
+            raise ValueError("Ingredient needs a name")
+        labels = split_labels(ingredient.get("labels"))
+        values = [as_number(ingredient.get(column)) for column in NUMERIC_COLUMNS]
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"INSERT INTO custom_ingredients (name_key, name, {', '.join(NUMERIC_COLUMNS)}, labels, added_at, version)"
+                f" VALUES (?, ?, {', '.join('?' * len(NUMERIC_COLUMNS))}, ?, ?, {_NEXT_VERSION})"
+                " ON CONFLICT (name_key) DO UPDATE SET"
+                f" name = excluded.name, {', '.join(f'{c} = excluded.{c}' for c in NUMERIC_COLUMNS)},"
+                " labels = excluded.labels, added_at = excluded.added_at, version = excluded.version, deleted = 0",
+                (key, str(ingredient["name"]).strip(), *values, ", ".join(labels), time.time()),
+            )
+            ingredient_id = conn.execute("SELECT id FROM custom_ingredients WHERE name_key = ?", (key,)).fetchone()[0]
+        return self.get(ingredient_id)
+
+    def remove(self, name):
+        """Remove one ingredient by name; returns whether it existed"""
+        cursor = self.conn.execute(
+            f"UPDATE custom_ingredients SET deleted = 1, version = {_NEXT_VERSION} WHERE name_key = ? AND NOT deleted",
+            (name_key(name),),
+        )
+        return cursor.rowcount > 0
+
+    # --- Reading ---
+    @staticmethod
+    def _row(row):
+        data = {"id": row["id"]}
+        data.update((column, row[column]) for column in FOOD_COLUMNS)
+        return data
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM custom_ingredients WHERE NOT deleted").fetchone()[0]
+
+    def get(self, ingredient_id):
+        """Ingredient dict for an id, or None (also for removed ones)"""
+        row = self.conn.execute(
+            "SELECT * FROM custom_ingredients WHERE id = ? AND NOT deleted", (ingredient_id,)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def all(self):
+        """Every ingredient, oldest first"""
+        rows = self.conn.execute("SELECT * FROM custom_ingredients WHERE NOT deleted ORDER BY id").fetchall()
+        return [self._row(r) for r in rows]
+
+    def changes_since(self, version):
+        """``(changed, removed_ids, latest_version)`` for every write after ``version``"""
+        rows = self.conn.execute(
+            "SELECT * FROM custom_ingredients WHERE version > ? ORDER BY version", (version,)
+        ).fetchall()
+        changed = [self._row(r) for r in rows if not r["deleted"]]
+        removed = [r["id"] for r in rows if r["deleted"]]
+        return changed, removed, max((r["version"] for r in rows), default=version)
+
+    # --- Search ---
+    def _sync_index(self):
+        # Callers hold _index_lock
+        changed, removed, self._index_version = self.changes_since(self._index_version)
+        for ingredient_id in removed:
+            name = self._indexed_names.pop(ingredient_id, None)
+            if name is not None:
+                self._index.remove(name)
+        for item in changed:
+            self._indexed_names[item["id"]] = item["name"]
+            self._index.add(item["name"], item["id"])
+
+    def search(self, query, k=5, min_score=0.5, exact=False):
+        """``(score, name, ingredient)`` tuples, best first, like ``NameIndex.search``"""
+        # NameIndex is not safe to read while another session adds to it
+        with self._index_lock:
+            self._sync_index()
+            found = self._index.search(query, k=k, min_score=min_score, exact=exact)
+        hits = []
+        for score, name, ingredient_id in found:
+            item = self.get(ingredient_id)
+            if item is not None:
+                hits.append((score, item["name"], item))
+        return hits
+
+
+def custom_frame(store, frame=None, version=0):
+    """Display table of ``store``, patched with the changes since ``version``.
+
+    Pass back the previous ``(frame, version)`` on every rerun: unchanged
+    stores cost one indexed query, and only changed rows are rebuilt.
+    Returns the new ``(frame, version)``.
+    """
+    if frame is None:
+        frame = pd.DataFrame(columns=FOOD_COLUMNS, index=pd.Index([], name="id"))
+    changed, removed, version = store.changes_since(version)
+    if changed or removed:
+        frame = frame.drop(index=[item["id"] for item in changed] + removed, errors="ignore")
+        fresh = pd.DataFrame(changed, columns=["id"] + FOOD_COLUMNS).set_index("id")
+        frame = fresh if frame.empty else pd.concat([frame, fresh])
+    return frame, version
+
+
+_custom_store = None
+_custom_store_lock = threading.Lock()
+
+
+def get_custom_store():
+    """Return the shared custom-ingredient store, creating its database on first use"""
+    global _custom_store
+    if _custom_store is None:
+        with _custom_store_lock:
+            if _custom_store is None:
+                _custom_store = CustomIngredientStore(DEFAULT_CUSTOM_DB_PATH)
+    return _custom_store
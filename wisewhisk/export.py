@@ -0,0 +1,188 @@
+"""Streaming export of analysis records as JSONL, CSV or Parquet.
+
+Each writer is a generator that takes any iterable of dicts and yields
+encoded byte chunks, ``chunk_size`` records at a time, so neither the
+records nor the encoded file ever have to be held in memory at once::
+
+    for chunk in iter_export(verdicts, "parquet"):
+        out.write(chunk)
+
+Parquet needs pyarrow; JSONL and CSV only use the standard library.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet export just isn't offered
+    pa = pq = None
+
+CHUNK_SIZE = 1000
+
+# format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def chunked(records, size):
+    """Lists of up to ``size`` records, read lazily from any iterable"""
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- JSONL ---
+def iter_jsonl(records, chunk_size=CHUNK_SIZE):
+    """One JSON object per line"""
+    for chunk in chunked(records, chunk_size):
+        yield "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in chunk).encode("utf-8")
+
+
+def _keys(chunk):
+    """Every key in a chunk of records, in first-seen order"""
+    return list(dict.fromkeys(key for record in chunk for key in record))
+
+
+# --- CSV ---
+def _cell(value):
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def iter_csv(records, fieldnames=None, chunk_size=CHUNK_SIZE):
+    """CSV with a header row; columns default to every key in the first chunk.
+
+    List values are joined with ``"; "`` and dicts are written as JSON.
+    Keys missing from a record are left blank, keys outside the columns are dropped.
+    """
+    buffer = io.StringIO()
+    writer = None
+    for chunk in chunked(records, chunk_size):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(fieldnames or _keys(chunk)),
+                                    restval="", extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows({k: _cell(v) for k, v in r.items()} for r in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+# --- Parquet ---
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _concrete(type_):
+    """Replace all-null column types inferred from the first chunk with strings"""
+    if pa.types.is_null(type_):
+        return pa.string()
+    if pa.types.is_list(type_):
+        return pa.list_(_concrete(type_.value_type))
+    return type_
+
+
+def _table(chunk, schema):
+    try:
+        return pa.Table.from_pydict({f.name: [r.get(f.name) for r in chunk] for f in schema}, schema=schema)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as exc:
+        raise ValueError(f"Records don't fit the Parquet schema ({exc}); pass schema= to set column types") from exc
+
+
+def iter_parquet(records, schema=None, fieldnames=None, chunk_size=10000, compression="zstd"):
+    """Parquet file written one row group per chunk.
+
+    ``schema`` (a ``pyarrow.Schema``) fixes columns and types. Otherwise the
+    types are inferred from the first chunk, for the ``fieldnames`` columns
+    or for every key in that chunk. With an explicit ``schema`` or
+    ``fieldnames``, keys outside them are dropped as in :func:`iter_csv`;
+    with inferred columns, a key first seen in a later chunk raises
+    ``ValueError`` rather than being lost, as does a value that doesn't fit
+    its column's type (say a list in a column that was all null at first).
+    """
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    explicit = schema is not None or fieldnames is not None
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for chunk in chunked(records, chunk_size):
+            if schema is None:
+                inferred = pa.Table.from_pydict({name: [r.get(name) for r in chunk]
+                                                 for name in (fieldnames or _keys(chunk))})
+                schema = pa.schema([pa.field(f.name, _concrete(f.type)) for f in inferred.schema])
+            elif not explicit:
+                unknown = [key for key in _keys(chunk) if schema.get_field_index(key) < 0]
+                if unknown:
+                    raise ValueError(f"Keys {unknown} first appear after the first {chunk_size} records; "
+                                     "pass schema= or fieldnames= to export them")
+            if writer is None:
+                writer = pq.ParquetWriter(sink, schema, compression=compression)
+            writer.write_table(_table(chunk, schema))
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        yield sink.drain()
+
+
+WRITERS = {
+    "jsonl": iter_jsonl,
+    "csv": iter_csv,
+    "parquet": iter_parquet,
+}
+
+
+def format_for_path(path, default="jsonl"):
+    """Export format implied by a file name's extension"""
+    for fmt, (_, extension) in EXPORT_FORMATS.items():
+        if str(path).lower().endswith(extension):
+            return fmt
+    return default
+
+
+def iter_export(records, fmt="jsonl", **options):
+    """Byte chunks of ``records`` encoded as ``fmt`` ('jsonl', 'csv' or 'parquet')"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(WRITERS)}")
+    return WRITERS[fmt](records, **options)
+
+
+def export_bytes(records, fmt="jsonl", **options):
+    """Whole export as one bytes object, for APIs that need it in one piece"""
+    return b"".join(iter_export(records, fmt, **options))
@@ -0,0 +1,101 @@
+import os
+
+import pandas as pd
+
+from wisewhisk.product import Nutriments, Product
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - feather cache is an optimisation only
+    feather = None
+
+FOOD_COLUMNS = ["name", "calories", "fat", "sugar", "protein", "sodium", "labels"]
+NUMERIC_COLUMNS = ["calories", "fat", "sugar", "protein", "sodium"]
+
+# foods.csv column -> Nutriments slot; values are per 100g
+NUTRIMENT_SLOTS = {"calories": "energy_kcal", "fat": "fat", "sugar": "sugars", "protein": "proteins",
+                   "sodium": "sodium"}
+
+
+def empty_foods():
+    return pd.DataFrame(columns=FOOD_COLUMNS)
+
+
+def clean_foods(df):
+    """Deduplicate on product identity and shrink dtypes.
+
+    Identity is the barcode when the file has one, otherwise the
+    normalized name. Numerics become float32 and ``labels`` a categorical,
+    since the same few label strings repeat across the whole catalog.
+    """
+    if df.empty:
+        return df
+    if "code" in df.columns:
+        identity = df["code"].astype(str).str.strip()
+    else:
+        identity = df["name"].astype(str).str.lower().str.split().str.join(" ")
+    df = df.loc[~identity.duplicated()].reset_index(drop=True)
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float32")
+    if "labels" in df.columns:
+        df["labels"] = df["labels"].astype("category")
+    return df
+
+
+def _feather_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".feather"
+
+
+def _write_feather(df, path):
+    # Uncompressed so readers can memory-map the columns instead of decoding them
+    tmp = path + ".tmp"
+    feather.write_feather(df, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def load_foods(csv_path="foods.csv"):
+    """Load the local food table, going through a memory-mapped Feather copy.
+
+    The CSV is parsed and cleaned once; later processes read the Feather
+    file with ``memory_map=True`` so numeric columns are backed by the
+    page cache and shared between workers rather than copied into each.
+    """
+    if not os.path.exists(csv_path):
+        return empty_foods()
+    if feather is None:
+        return clean_foods(pd.read_csv(csv_path))
+
+    cache_path = _feather_path(csv_path)
+    try:
+        fresh = os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)
+    except OSError:
+        fresh = False
+    if not fresh:
+        df = clean_foods(pd.read_csv(csv_path))
+        try:
+            _write_feather(df, cache_path)
+        except OSError:
+            return df
+    table = feather.read_table(cache_path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def food_product(food):
+    """A local food row (or custom ingredient dict) as a ``Product``.
+
+    Local foods have no ingredient list, so the name stands in for one:
+    "Organic Peanut Butter" still trips a peanut allergy.
+    """
+    values = {}
+    for column, slot in NUTRIMENT_SLOTS.items():
+        value = pd.to_numeric(food.get(column), errors="coerce")
+        if pd.notna(value):
+            values[slot] = float(value)
+    labels = food.get("labels")
+    return Product(
+        product_name=str(food["name"]),
+        ingredients_text=str(food["name"]),
+        categories=str(labels) if pd.notna(labels) and str(labels) else None,
+        nutriments=Nutriments(**values),
+    )
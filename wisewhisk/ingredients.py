@@ -0,0 +1,126 @@
+"""Ingredient-list tokenizer.
+
+Turns a label such as::
+
+    Ingredients: sugar, chocolate 20% (cocoa mass, cocoa butter, emulsifier: soy lecithin (E322)),
+    hazelnuts (13%). May contain traces of peanuts.
+
+into a tree of ``{"name", "percent", "e_number", "children"}`` nodes plus
+the "contains" / "may contain" declarations. The text is split once by a
+precompiled delimiter pattern and the pieces are folded with a stack, so
+the work is linear in the label length.
+"""
+import re
+
+PREFIX_RE = re.compile(r"^\s*ingredients?\s*:?\s*", re.IGNORECASE)
+# Capturing group so re.split keeps the delimiters; "." only ends a sentence, not "1.5",
+# and a comma between digits is a decimal comma ("salt 0,5 %"), not a separator
+SPLIT_RE = re.compile(r"([()\[\]{};]|(?<!\d),|,(?!\d)|\s+and\s+|\.(?=\s|$))", re.IGNORECASE)
+CLAUSE_RE = re.compile(
+    r"^(?:(?P<may>may\s+(?:also\s+)?contain|traces?\s+of)|contains?|allergens?)"
+    r"(?:\s+traces?\s+of)?\s*:?\s*",
+    re.IGNORECASE,
+)
+# US labels: "contains 2% or less of: salt, ..." lists minor ingredients, not allergens
+MINOR_RE = re.compile(
+    r"^contains?\s+(?:\d+(?:[.,]\d+)?\s*%\s+or\s+less|less\s+than\s+\d+(?:[.,]\d+)?\s*%)"
+    r"(?:\s+of)?(?:\s+each\s+of)?(?:\s+the\s+following)?\s*:?\s*",
+    re.IGNORECASE,
+)
+PERCENT_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*%")
+E_NUMBER_RE = re.compile(r"\bE\s?-?(\d{3,4}[a-j]?)\b", re.IGNORECASE)
+SPACES_RE = re.compile(r"\s+")
+STRIP_CHARS = " \t\r\n*:-_'\""
+
+OPENERS = frozenset("([{")
+CLOSERS = frozenset(")]}")
+MIN_NAME_LENGTH = 3
+
+
+def _node(piece):
+    """Node for one ingredient fragment (name may be empty for a bare "13%")"""
+    percent = None
+    match = PERCENT_RE.search(piece)
+    if match:
+        percent = float(match.group(1).replace(",", "."))
+        piece = piece[:match.start()] + piece[match.end():]
+    match = E_NUMBER_RE.search(piece)
+    e_number = f"E{match.group(1).upper()}" if match else None
+    name = SPACES_RE.sub(" ", piece).strip(STRIP_CHARS)
+    return {"name": name.title(), "percent": percent, "e_number": e_number, "children": []}
+
+
+def parse_ingredients(raw_text):
+    """Structured parse of a raw ingredient list.
+
+    Returns ``{"ingredients": [...], "contains": [...], "may_contain": [...]}``
+    where every entry is a node and sub-ingredients in parentheses or
+    brackets are the ``children`` of the ingredient they follow.
+    """
+    result = {"ingredients": [], "contains": [], "may_contain": []}
+    text = PREFIX_RE.sub("", raw_text or "", count=1)
+    # Stack of (node that owns the open group, list new nodes go into)
+    stack = [(None, result["ingredients"])]
+    last = None
+    for i, piece in enumerate(SPLIT_RE.split(text)):
+        if i % 2:
+            delim = piece.strip()
+            if delim in OPENERS:
+                stack.append((last, last["children"] if last else stack[-1][1]))
+                last = None
+            elif delim in CLOSERS:
+                if len(stack) > 1:
+                    last = stack.pop()[0]
+            else:
+                last = None
+                if delim == "." and len(stack) == 1:
+                    # A sentence ends any "contains ..." clause
+                    stack[0] = (None, result["ingredients"])
+            continue
+
+        piece = piece.strip()
+        if not piece:
+            continue
+        if len(stack) == 1:
+            minor = MINOR_RE.match(piece)
+            clause = None if minor else CLAUSE_RE.match(piece)
+            if minor:
+                stack[0] = (None, result["ingredients"])
+                piece = piece[minor.end():]
+            elif clause:
+                stack[0] = (None, result["may_contain" if clause.group("may") else "contains"])
+                piece = piece[clause.end():]
+        node = _node(piece)
+        owner, target = stack[-1]
+        if owner is not None and node["e_number"] and node["name"].upper() == node["e_number"] \
+                and not owner["e_number"]:
+            # "soy lecithin (E322)": the bracket names the parent's additive code
+            owner["e_number"] = node["e_number"]
+        elif len(node["name"]) >= MIN_NAME_LENGTH or node["e_number"]:
+            target.append(node)
+            last = node
+        elif node["percent"] is not None and owner is not None and not node["name"]:
+            # "hazelnuts (13%)": the bracket only carries the parent's share
+            owner["percent"] = node["percent"]
+    return result
+
+
+def iter_nodes(nodes):
+    """Nodes depth-first, parents before their sub-ingredients"""
+    for node in nodes:
+        yield node
+        yield from iter_nodes(node["children"])
+
+
+def iter_names(nodes):
+    """Ingredient names depth-first, parents before their sub-ingredients"""
+    for node in iter_nodes(nodes):
+        yield node["name"]
+
+
+def flatten_ingredients(parsed):
+    """Every ingredient name in a parse, including declared and possible traces"""
+    names = list(iter_names(parsed["ingredients"]))
+    names.extend(iter_names(parsed["contains"]))
+    names.extend(iter_names(parsed["may_contain"]))
+    return names
@@ -0,0 +1,121 @@
+"""Chat intent classifier.
+
+Keywords and phrases are compiled into a token trie, so a query is
+tokenized once and every intent is scored in the same left-to-right pass.
+Matching works on whole tokens: "vs" no longer fires inside "canvas".
+Cue words at the start of a question ("compare ...", "info on ...") weigh
+more than the same words later on, so the question's lead decides between
+intents instead of the order they are checked in. Nutrient nouns are left
+out of that boost: they are as often part of the product ("is sugar safe?",
+"protein powder") as they are the question.
+"""
+import re
+
+GENERAL = "general_query"
+
+# intent -> {keyword or phrase: weight}
+INTENT_KEYWORDS = {
+    "comparison": {
+        "compare": 1.5, "comparison": 1.5, "compared": 1.5, "vs": 1.0, "versus": 1.0, "against": 1.0,
+        "difference": 1.0, "better than": 1.0, "worse than": 1.0, "healthier": 1.0, "healthier than": 1.0,
+        "side by side": 1.0, "side-by-side": 1.0, "which is better": 1.5, "which is healthier": 1.5,
+    },
+    "safety_check": {
+        "safe": 1.0, "safety": 1.0, "diabetic": 1.0, "diabetes": 1.0, "allergic": 1.0, "allergy": 1.0,
+        "allergies": 1.0, "risk": 1.0, "risky": 1.0, "bad for": 1.0, "warning": 1.0, "danger": 1.0,
+        "dangerous": 1.0, "harmful": 1.0, "can i eat": 1.0,
+    },
+    "nutrition_info": {
+        "nutrition": 1.0, "nutritional": 1.0, "calories": 1.0, "calorie": 1.0, "kcal": 1.0, "info": 1.0,
+        "information": 1.0, "protein": 1.0, "sugar": 1.0, "carbs": 1.0, "nutrients": 1.0, "macros": 1.0,
+        "fat": 0.8, "fibre": 0.8, "fiber": 0.8,
+    },
+}
+
+# Cue words among the first LEAD_TOKENS tokens get this multiplier
+LEAD_TOKENS = 2
+LEAD_BOOST = 1.5
+
+# Cue words that never get the lead boost
+UNBOOSTED = frozenset({"protein", "sugar", "carbs", "fat", "fibre", "fiber"})
+
+# Pseudo-score of "no particular intent"; keeps confidences honest for weak matches
+GENERAL_PRIOR = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+_END = None
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class IntentClassifier:
+    """Token-trie keyword automaton scoring every intent in one pass"""
+
+    def __init__(self, keywords=INTENT_KEYWORDS, lead_tokens=LEAD_TOKENS, lead_boost=LEAD_BOOST,
+                 general_prior=GENERAL_PRIOR, unboosted=UNBOOSTED):
+        self.intents = list(keywords)
+        self.lead_tokens = lead_tokens
+        self.lead_boost = lead_boost
+        self.general_prior = general_prior
+        self._trie = {}
+        for intent, phrases in keywords.items():
+            for phrase, weight in phrases.items():
+                node = self._trie
+                for token in tokenize(phrase):
+                    node = node.setdefault(token, {})
+                node.setdefault(_END, []).append((intent, weight, phrase not in unboosted))
+
+    def _start(self, token):
+        node = self._trie.get(token)
+        if node is None and len(token) > 3 and token.endswith("s"):
+            node = self._trie.get(token[:-1])
+        return node
+
+    def scores(self, query):
+        """Raw score per intent"""
+        tokens = tokenize(query)
+        scores = dict.fromkeys(self.intents, 0.0)
+        i = 0
+        while i < len(tokens):
+            node = self._start(tokens[i])
+            matched, length = None, 1
+            j = i + 1
+            while node is not None:
+                if _END in node:
+                    matched, length = node[_END], j - i
+                if j == len(tokens):
+                    break
+                node = node.get(tokens[j])
+                j += 1
+            if matched:
+                lead = i < self.lead_tokens
+                for intent, weight, boosted in matched:
+                    scores[intent] += weight * (self.lead_boost if lead and boosted else 1.0)
+            i += length
+        return scores
+
+    def classify(self, query):
+        """Every intent (including ``general_query``) with its confidence, best first"""
+        scores = self.scores(query)
+        scores[GENERAL] = self.general_prior
+        total = sum(scores.values())
+        # Ties go to the intent listed first, as the old cascade did
+        order = {intent: n for n, intent in enumerate(scores)}
+        return sorted(((intent, round(score / total, 4)) for intent, score in scores.items()),
+                      key=lambda item: (-item[1], order[item[0]]))
+
+    def predict(self, query):
+        """The most likely intent, or ``general_query`` when no cue word matched"""
+        scores = self.scores(query)
+        best = max(scores, key=scores.get) if scores else None
+        return best if best and scores[best] > 0 else GENERAL
+
+
+DEFAULT_CLASSIFIER = IntentClassifier()
+
+
+def classify_intent(query):
+    """``[(intent, confidence), ...]`` for ``query``, best first"""
+    return DEFAULT_CLASSIFIER.classify(query)
@@ -0,0 +1,62 @@
+"""Local food lookups shared by the apps.
+
+``foods.csv`` and the custom-ingredient store are searched as one catalog,
+best score wins, and names are only sent to Open Food Facts when neither
+has a word-for-word match.
+"""
+from wisewhisk.foods import food_product
+from wisewhisk.openfoodfacts import search_open_food_facts
+from wisewhisk.queries import product_mention
+from wisewhisk.search import build_name_index
+
+# A local name must match this well, word for word, to be used instead of Open Food Facts
+LOCAL_MATCH_SCORE = 0.75
+
+
+class LocalFoods:
+    """The local food table plus the custom-ingredient store, behind one name search.
+
+    Generic words never stand in for a longer local name:
+
+    >>> import pandas as pd
+    >>> from wisewhisk.queries import nutrition_subject
+    >>> foods = LocalFoods(pd.DataFrame({"name": ["Organic Peanut Butter", "Whole Grain Bread", "Almond Milk"]}))
+    >>> foods.find(product_mention("is butter safe for me")["name"], LOCAL_MATCH_SCORE, exact=True) is None
+    True
+    >>> foods.find(product_mention("is bread ok for celiacs")["name"], LOCAL_MATCH_SCORE, exact=True) is None
+    True
+    >>> foods.find(nutrition_subject("calories in milk"), LOCAL_MATCH_SCORE, exact=True) is None
+    True
+    >>> foods.find(nutrition_subject("how many calories in almond milk"), LOCAL_MATCH_SCORE, exact=True)["name"]
+    'Almond Milk'
+    """
+
+    def __init__(self, foods, custom=None):
+        self.foods = foods
+        self.index = build_name_index(foods)
+        self.custom = custom
+
+    def find(self, query, min_score=0.5, exact=False):
+        """Best name match (a food row or a custom ingredient dict), or None"""
+        hits = [(score, self.foods.loc[label])
+                for score, _, label in self.index.search(query, k=1, min_score=min_score, exact=exact)]
+        if self.custom is not None:
+            hits += [(score, item)
+                     for score, _, item in self.custom.search(query, k=1, min_score=min_score, exact=exact)]
+        if not hits:
+            return None
+        return max(hits, key=lambda hit: hit[0])[1]
+
+    def find_product(self, query, min_score=LOCAL_MATCH_SCORE):
+        """``Product`` for a name: a word-for-word local match first, then Open Food Facts"""
+        food = self.find(query, min_score=min_score, exact=True)
+        if food is not None:
+            return food_product(food)
+        return search_open_food_facts(query)
+
+    def find_mentioned_product(self, prompt):
+        """Product a question such as "is nutella safe for me?" names, or None"""
+        mention = product_mention(prompt)
+        if mention is None:
+            return None
+        return self.find_product(mention['name'])
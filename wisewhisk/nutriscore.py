@@ -0,0 +1,161 @@
+"""Nutri-Score (2017 general-foods algorithm) computed locally.
+
+Points are the number of thresholds a value strictly exceeds, per 100g:
+negative points for energy, sugars, saturated fat and sodium, positive
+points for fruit/vegetables/nuts, fibre and protein. Beverages, cheeses
+and added fats use different tables and are not covered here.
+"""
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from wisewhisk.store import FALLBACK_KEYS, as_number
+
+ENERGY_KJ = [335, 670, 1005, 1340, 1675, 2010, 2345, 2680, 3015, 3350]
+SUGARS_G = [4.5, 9, 13.5, 18, 22.5, 27, 31, 36, 40, 45]
+SATURATED_FAT_G = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+SODIUM_MG = [90, 180, 270, 360, 450, 540, 630, 720, 810, 900]
+FIBER_G = [0.9, 1.9, 2.8, 3.7, 4.7]
+PROTEINS_G = [1.6, 3.2, 4.8, 6.4, 8.0]
+FRUIT_VEG_PCT = [40, 60, 80]
+FRUIT_VEG_POINTS = [0, 1, 2, 5]
+
+# Upper score bound (inclusive) for grades A-D; anything higher is E
+GRADE_BOUNDS = [(-1, 'a'), (2, 'b'), (10, 'c'), (18, 'd')]
+
+KCAL_TO_KJ = 4.184
+SALT_TO_SODIUM = 1 / 2.5
+
+
+def _first(nutriments, keys):
+    for key in keys:
+        value = as_number(nutriments.get(key))
+        if value is not None:
+            return value
+    return None
+
+
+def _energy_kj(nutriments):
+    kj = _first(nutriments, FALLBACK_KEYS['energy_kj'])
+    if kj is None:
+        kcal = as_number(nutriments.get('energy-kcal_100g'))
+        kj = None if kcal is None else kcal * KCAL_TO_KJ
+    return kj
+
+
+def _sodium_mg(nutriments):
+    sodium = as_number(nutriments.get('sodium_100g'))
+    if sodium is None:
+        salt = as_number(nutriments.get('salt_100g'))
+        sodium = None if salt is None else salt * SALT_TO_SODIUM
+    return None if sodium is None else sodium * 1000
+
+
+def grade_for_score(score):
+    for bound, grade in GRADE_BOUNDS:
+        if score <= bound:
+            return grade
+    return 'e'
+
+
+def nutriscore_points(energy_kj, sugars, saturated_fat, sodium_mg, fiber=0, proteins=0, fruit_veg=0):
+    """Return the final Nutri-Score points for one product (lower is better)"""
+    negative = (bisect_left(ENERGY_KJ, energy_kj) + bisect_left(SUGARS_G, sugars)
+                + bisect_left(SATURATED_FAT_G, saturated_fat) + bisect_left(SODIUM_MG, sodium_mg))
+    fruit_points = FRUIT_VEG_POINTS[bisect_left(FRUIT_VEG_PCT, fruit_veg)]
+    fiber_points = bisect_left(FIBER_G, fiber)
+    if negative >= 11 and fruit_points < 5:
+        # Protein only offsets very "negative" products when they're mostly fruit/veg
+        return negative - fiber_points - fruit_points
+    return negative - fiber_points - fruit_points - bisect_left(PROTEINS_G, proteins)
+
+
+def compute_nutriscore(nutriments):
+    """Return ``(score, grade)`` from an OFF nutriments dict, or None if data is missing.
+
+    Energy, sugars, saturated fat and sodium (or salt) are required;
+    fibre, protein and fruit/veg content count as 0 when absent.
+    """
+    energy = _energy_kj(nutriments)
+    sugars = as_number(nutriments.get('sugars_100g'))
+    saturated_fat = as_number(nutriments.get('saturated-fat_100g'))
+    sodium = _sodium_mg(nutriments)
+    if energy is None or sugars is None or saturated_fat is None or sodium is None:
+        return None
+    score = nutriscore_points(
+        energy, sugars, saturated_fat, sodium,
+        fiber=as_number(nutriments.get('fiber_100g')) or 0,
+        proteins=as_number(nutriments.get('proteins_100g')) or 0,
+        fruit_veg=_first(nutriments, FALLBACK_KEYS['fruit_veg']) or 0,
+    )
+    return score, grade_for_score(score)
+
+
+def product_nutriscore_grade(product):
+    """Grade OFF published for ``product``, else one computed from its nutriments"""
+    grade = str(product.get('nutriscore_grade') or "").lower()
+    if grade in ('a', 'b', 'c', 'd', 'e'):
+        return grade
+    result = compute_nutriscore(product.get('nutriments') or {})
+    return result[1] if result else None
+
+
+# --- Batch mode ---
+def _array(data, name, n):
+    if name not in data:
+        return np.full(n, np.nan)
+    return pd.to_numeric(pd.Series(np.asarray(data[name]).ravel()), errors="coerce").to_numpy(
+        dtype="float64", na_value=np.nan)
+
+
+def _points(thresholds, values):
+    # Count of thresholds strictly below each value, i.e. bisect_left
+    return np.searchsorted(np.asarray(thresholds, dtype="float64"), np.nan_to_num(values), side="left")
+
+
+def compute_nutriscores(data, columns=None):
+    """Vectorized ``compute_nutriscore`` over many products.
+
+    ``data`` is a DataFrame or a mapping of equal-length arrays keyed by
+    OFF nutriment names (``columns`` remaps them, e.g. to store columns).
+    Returns ``(scores, grades)``: a float array with NaN where required
+    data is missing, and an object array of grades with None there.
+    """
+    columns = columns or {}
+    if isinstance(data, pd.DataFrame):
+        n = len(data)
+    else:
+        n = len(next(iter(data.values()))) if data else 0
+
+    def get(key):
+        return _array(data, columns.get(key, key), n)
+
+    energy = np.full(n, np.nan)
+    for key in FALLBACK_KEYS['energy_kj']:
+        energy = np.where(np.isnan(energy), get(key), energy)
+    energy = np.where(np.isnan(energy), get('energy-kcal_100g') * KCAL_TO_KJ, energy)
+    sodium = get('sodium_100g')
+    sodium = np.where(np.isnan(sodium), get('salt_100g') * SALT_TO_SODIUM, sodium) * 1000
+    sugars = get('sugars_100g')
+    saturated_fat = get('saturated-fat_100g')
+    fruit_veg = np.full(n, np.nan)
+    for key in FALLBACK_KEYS['fruit_veg']:
+        fruit_veg = np.where(np.isnan(fruit_veg), get(key), fruit_veg)
+
+    negative = (_points(ENERGY_KJ, energy) + _points(SUGARS_G, sugars)
+                + _points(SATURATED_FAT_G, saturated_fat) + _points(SODIUM_MG, sodium))
+    fruit_points = np.asarray(FRUIT_VEG_POINTS)[_points(FRUIT_VEG_PCT, fruit_veg)]
+    fiber_points = _points(FIBER_G, get('fiber_100g'))
+    protein_points = _points(PROTEINS_G, get('proteins_100g'))
+    protein_points = np.where((negative >= 11) & (fruit_points < 5), 0, protein_points)
+
+    scores = (negative - fiber_points - fruit_points - protein_points).astype("float64")
+    missing = np.isnan(energy) | np.isnan(sugars) | np.isnan(saturated_fat) | np.isnan(sodium)
+    scores[missing] = np.nan
+
+    bounds = np.asarray([bound for bound, _ in GRADE_BOUNDS], dtype="float64")
+    letters = np.asarray([grade for _, grade in GRADE_BOUNDS] + ['e'], dtype=object)
+    grades = letters[np.searchsorted(bounds, np.nan_to_num(scores), side="left")]
+    grades[missing] = None
+    return scores, grades
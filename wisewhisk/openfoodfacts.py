@@ -0,0 +1,308 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - requests' stdlib decoder is the fallback
+    orjson = None
+
+from wisewhisk.cache import ResponseCache
+from wisewhisk.nutriscore import product_nutriscore_grade
+from wisewhisk.product import PRODUCT_FIELDS, Product, to_json
+from wisewhisk.search import NameIndex
+from wisewhisk.store import get_store, name_key
+
+BASE_URL = "https://world.openfoodfacts.org"
+USER_AGENT = "WiseWhisk/2.0 (EnCode 2026 Hackathon)"
+
+# (connect, read) timeouts in seconds per endpoint; search is much slower
+# than a single product read on the OFF side
+TIMEOUTS = {
+    "product": (3.05, 5),
+    "search": (3.05, 10),
+}
+
+# Candidates ranked when a caller only wants the single best match
+RANKED_CANDIDATES = 5
+
+# Upper bound on a whole batch lookup, so one slow search can't hold a
+# comparison hostage
+BATCH_DEADLINE = 12
+
+
+
+def _from_cache(value):
+    """Rebuild Products in a cached product payload or search page read back from disk"""
+    if isinstance(value, dict):
+        if 'product' in value:
+            value['product'] = Product.from_off(value['product'])
+        if 'products' in value:
+            value['products'] = [Product.from_off(p) for p in value['products']]
+    return value
+
+
+# Shared across every Streamlit session and rerun in this process, and
+# persisted on disk so restarts start warm. The memory tier holds Product
+# objects; the disk tier holds their OFF-shaped JSON.
+OFF_CACHE = ResponseCache(encode=to_json, decode=_from_cache)
+
+
+class OpenFoodFactsClient:
+    """Thin Open Food Facts client built on one pooled keep-alive session.
+
+    The session reuses TCP/TLS connections across calls, caps the pool
+    size, and retries idempotent requests on 429/5xx with jittered
+    exponential backoff (honouring ``Retry-After``).
+    """
+
+    def __init__(self, base_url=BASE_URL, pool_size=10, retries=3, backoff_factor=0.3,
+                 backoff_jitter=0.5, timeouts=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = dict(TIMEOUTS, **(timeouts or {}))
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True,
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get(self, endpoint, path, params=None):
+        return self.session.get(self.base_url + path, params=params,
+                                timeout=self.timeouts[endpoint])
+
+    def product(self, barcode, fields=PRODUCT_FIELDS):
+        """Return the v2 product payload, or None if OFF doesn't know the barcode"""
+        params = {"fields": ",".join(fields)} if fields else None
+        response = self._get("product", f"/api/v2/product/{barcode}.json", params=params)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = _decode(response)
+        return data if data.get('status') == 1 else None
+
+    def search_page(self, query, page=1, page_size=RANKED_CANDIDATES, fields=PRODUCT_FIELDS):
+        """One page of search hits as ``{"count": total hits, "products": [...]}``.
+
+        ``fields`` projects each product down to the listed attributes, which
+        keeps search responses a small fraction of full product documents.
+        """
+        params = {"search_terms": query, "search_simple": 1, "action": "process", "json": 1,
+                  "page": page, "page_size": page_size}
+        if fields:
+            params["fields"] = ",".join(fields)
+        response = self._get("search", "/cgi/search.pl", params=params)
+        response.raise_for_status()
+        data = _decode(response)
+        return {"count": int(data.get('count') or 0), "products": data.get('products') or []}
+
+    def close(self):
+        self.session.close()
+
+
+def _decode(response):
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+_client = None
+_executor = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenFoodFactsClient()
+    return _client
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _client_lock:
+            if _executor is None:
+                # Matches the connection pool so workers never queue for a socket
+                _executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="off-lookup")
+    return _executor
+
+
+def _normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+
+def with_nutriscore(product):
+    """Fill in ``nutriscore_grade`` locally when OFF didn't publish a usable one.
+
+    OFF sends placeholders like "unknown" or "not-applicable"; those are
+    replaced by the computed grade, or cleared if it can't be computed.
+    """
+    if product is not None:
+        product.nutriscore_grade = product_nutriscore_grade(product)
+    return product
+
+
+def _load_product(barcode):
+    data = get_client().product(barcode)
+    if data:
+        data = {"code": data.get('code', barcode), "status": 1,
+                "product": with_nutriscore(Product.from_off(data.get('product')))}
+    return data
+
+
+def _load_search(query, page, page_size):
+    data = get_client().search_page(query, page=page, page_size=page_size)
+    data["products"] = [with_nutriscore(Product.from_off(p)) for p in data["products"]]
+    return data
+
+
+def fetch_open_food_facts(barcode):
+    """Fetch product data by barcode, from the local store when possible"""
+    barcode = str(barcode).strip()
+    if not barcode:
+        return None
+    store = get_store()
+    if store is not None:
+        product = store.get(barcode)
+        if product:
+            return {"code": barcode, "status": 1, "product": Product.from_off(product)}
+    return OFF_CACHE.get_or_fetch(f"product:{barcode}", lambda: _load_product(barcode))
+
+
+def rank_products(query, products):
+    """Drop repeated barcodes (first one wins) and order by how well the name matches"""
+    unique, seen = [], set()
+    for product in products:
+        code = str(product.get('code') or '').strip()
+        if code:
+            if code in seen:
+                continue
+            seen.add(code)
+        unique.append(product)
+
+    index = NameIndex()
+    for product in unique:
+        index.add(product.get('product_name') or '')
+    scores = {name_key(name): score for score, name, _ in index.search(query, k=len(index), min_score=0)}
+
+    def rank(item):
+        position, product = item
+        return (-scores.get(name_key(product.get('product_name')), 0), not product.get('nutriments'), position)
+
+    return [product for _, product in sorted(enumerate(unique), key=rank)]
+
+
+def search_products(query, k=10, page=1, remote=True):
+    """Top-``k`` products for a name query, merged from the local store and OFF.
+
+    Results are one sequence, every store hit first and then OFF's hits in
+    OFF's order, cut into pages of ``k``; each page is de-duplicated by
+    barcode and ranked by name match. The OFF part of a page is read at an
+    offset shifted by the store hits, so an OFF hit pushed off page 1 by
+    store hits opens page 2 instead of being skipped, and OFF is only asked
+    when the store can't fill the page. Returns ``{"query", "page", "k",
+    "count", "products"}`` where ``count`` is the total number of hits known.
+    """
+    query = _normalize_query(query)
+    result = {"query": query, "page": page, "k": k, "count": 0, "products": []}
+    if not query or k < 1 or page < 1:
+        return result
+    store = get_store()
+    stored = [Product.from_off(p) for p in store.search(query, limit=page * k)] if store is not None else []
+    candidates = stored[(page - 1) * k:]
+    count = len(stored)
+    # This page's slice of the OFF hits, and the OFF pages (of k hits) that hold it
+    start, stop = max((page - 1) * k - len(stored), 0), page * k - len(stored)
+    if remote and stop > 0:
+        first, last = start // k + 1, (stop - 1) // k + 1
+        remote_hits = []
+        for off_page in range(first, last + 1):
+            data = OFF_CACHE.get_or_fetch(f"search:{query}:{off_page}:{k}",
+                                          lambda off_page=off_page: _load_search(query, off_page, k))
+            if not data:
+                break
+            remote_hits += data["products"]
+            count = max(count, len(stored) + data["count"])
+        offset = (first - 1) * k
+        # OFF copies of store hits were already listed with the store hits
+        stored_codes = {p.code for p in stored if p.code}
+        candidates += [p for p in remote_hits[start - offset:stop - offset] if p.get('code') not in stored_codes]
+    result["products"] = rank_products(query, candidates)[:k]
+    if result["products"]:
+        count = max(count, (page - 1) * k + len(result["products"]))
+    result["count"] = count
+    return result
+
+
+def search_open_food_facts(query):
+    """Best match for a product name, from the local store when possible"""
+    query = _normalize_query(query)
+    if not query:
+        return None
+    store = get_store()
+    if store is not None:
+        hits = store.search(query)
+        if hits:
+            return Product.from_off(hits[0])
+    products = search_products(query, k=RANKED_CANDIDATES)["products"]
+    return products[0] if products else None
+
+
+def is_barcode(query):
+    query = str(query).strip()
+    return query.isdigit() and 8 <= len(query) <= 14
+
+
+def lookup_product(query):
+    """Resolve a barcode or product name to a single product dict, or None"""
+    if is_barcode(query):
+        data = fetch_open_food_facts(query)
+        return data['product'] if data else None
+    return search_open_food_facts(query)
+
+
+def lookup_products(queries, deadline=BATCH_DEADLINE):
+    """Resolve many barcodes/product names concurrently.
+
+    Returns a list aligned with ``queries``; entries that are not found, or
+    not resolved before ``deadline`` seconds, are None. Duplicate queries
+    are only looked up once.
+    """
+    queries = [str(q).strip() for q in queries]
+    unique = list(dict.fromkeys(q for q in queries if q))
+    if not unique:
+        return [None] * len(queries)
+    if len(unique) == 1:
+        result = lookup_product(unique[0])
+        return [result if q else None for q in queries]
+
+    executor = _get_executor()
+    futures = {q: executor.submit(lookup_product, q) for q in unique}
+    done, not_done = wait(futures.values(), timeout=deadline)
+    for future in not_done:
+        future.cancel()
+
+    results = {}
+    for q, future in futures.items():
+        if future in done and future.exception() is None:
+            results[q] = future.result()
+    return [results.get(q) for q in queries]
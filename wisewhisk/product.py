@@ -0,0 +1,151 @@
+"""Compact product record shared by scoring, allergen checks and rendering.
+
+Open Food Facts responses and store rows are turned into a ``Product`` once,
+when they are fetched, and that object is what the caches hold and every
+view reads. Both classes use ``__slots__``, so thousands of cached products
+cost a few hundred bytes each instead of a tree of dicts.
+
+For code written against raw OFF dicts, both also answer ``get()`` and
+``[]`` with OFF keys (``product.get('nutriments').get('sugars_100g')``).
+"""
+from wisewhisk.store import FALLBACK_KEYS, NUTRIMENT_COLUMNS, as_number
+
+# Product attributes the apps use; also the fields= projection sent to OFF
+PRODUCT_FIELDS = ("code", "product_name", "brands", "categories", "ingredients_text", "allergens",
+                  "nutriscore_grade", "image_url", "nutriments")
+
+
+def format_amount(value, default="N/A"):
+    """``539.0`` -> ``"539"``, ``None`` -> ``default``"""
+    return default if value is None else f"{value:g}"
+
+
+# OFF nutriment key -> Nutriments slot, including the alternate keys
+_SLOT_FOR_OFF_KEY = {
+    **{key: column for column, keys in FALLBACK_KEYS.items() for key in keys},
+    **{key: column for column, key in NUTRIMENT_COLUMNS.items()},
+}
+
+
+class Nutriments:
+    """Per-100g nutriments as floats, ``None`` when unknown"""
+
+    __slots__ = tuple(NUTRIMENT_COLUMNS)
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_off(cls, nutriments):
+        """From an OFF ``nutriments`` dict, taking the first usable key per nutrient"""
+        if isinstance(nutriments, cls):
+            return nutriments
+        nutriments = nutriments or {}
+        values = {}
+        for column, key in NUTRIMENT_COLUMNS.items():
+            for candidate in FALLBACK_KEYS.get(column, (key,)):
+                value = as_number(nutriments.get(candidate))
+                if value is not None:
+                    values[column] = value
+                    break
+        return cls(**values)
+
+    def get(self, key, default=None):
+        """Value by OFF key (``"sugars_100g"``) or slot name (``"sugars"``)"""
+        name = _SLOT_FOR_OFF_KEY.get(key, key)
+        value = getattr(self, name, None) if name in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def items(self):
+        """``(OFF key, value)`` pairs for the known nutriments"""
+        return ((NUTRIMENT_COLUMNS[name], getattr(self, name)) for name in self.__slots__
+                if getattr(self, name) is not None)
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def __len__(self):
+        return sum(getattr(self, name) is not None for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, Nutriments) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        """OFF-shaped dict of the known nutriments"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Nutriments({', '.join(f'{k}={v:g}' for k, v in self.items())})"
+
+
+class Product:
+    """One food product: the handful of OFF fields the apps use"""
+
+    __slots__ = PRODUCT_FIELDS
+
+    def __init__(self, code=None, product_name=None, brands=None, categories=None, ingredients_text=None,
+                 allergens=None, nutriscore_grade=None, image_url=None, nutriments=None):
+        self.code = code
+        self.product_name = product_name
+        self.brands = brands
+        self.categories = categories
+        self.ingredients_text = ingredients_text
+        self.allergens = allergens
+        self.nutriscore_grade = nutriscore_grade
+        self.image_url = image_url
+        self.nutriments = nutriments if isinstance(nutriments, Nutriments) else Nutriments.from_off(nutriments)
+
+    @classmethod
+    def from_off(cls, data):
+        """From an OFF product dict (full or projected) or a store row dict; None stays None"""
+        if data is None or isinstance(data, cls):
+            return data
+        fields = {}
+        for name in PRODUCT_FIELDS[:-1]:
+            value = data.get(name)
+            if value not in (None, ''):
+                fields[name] = str(value)
+        return cls(nutriments=data.get('nutriments'), **fields)
+
+    def get(self, key, default=None):
+        """Attribute by OFF key, ``default`` when unknown (mirrors ``dict.get``)"""
+        value = getattr(self, key, None) if key in PRODUCT_FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        return isinstance(other, Product) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        """OFF-shaped dict, e.g. for JSON responses or the disk cache"""
+        data = {name: getattr(self, name) for name in PRODUCT_FIELDS[:-1] if getattr(self, name) is not None}
+        data['nutriments'] = self.nutriments.to_dict()
+        return data
+
+    def __repr__(self):
+        return f"Product(code={self.code!r}, product_name={self.product_name!r})"
+
+
+def to_json(value):
+    """``default=`` hook for json/orjson so Products serialize as OFF dicts"""
+    if isinstance(value, (Product, Nutriments)):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
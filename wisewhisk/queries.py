@@ -0,0 +1,138 @@
+"""Product mentions in chat prompts.
+
+``parse_comparison`` turns "compare 100g peanut butter and jelly vs diet coke"
+into one mention per product, each with its quantity and modifiers, and
+``product_mention`` finds the one product a safety question is about, and
+``nutrition_subject`` the food a nutrition question asks about, so the apps
+only look up things that are actually products.
+"""
+import re
+
+from wisewhisk.search import STOPWORDS
+
+# Explicit separators between compared products. "and" / "or" only
+# separate when none of these is present ("peanut butter and jelly vs nutella").
+_STRONG_SEPARATOR = r"\s+(?:vs\.?|v\.|versus|compared\s+(?:to|with)|against|(?:better|healthier|worse)\s+than)\s+"
+_WEAK_SEPARATOR = r"\s*,\s*(?:(?:and|or)\s+)?|\s+(?:and|or)\s+"
+STRONG_SEPARATOR_RE = re.compile(_STRONG_SEPARATOR, re.IGNORECASE)
+WEAK_SEPARATOR_RE = re.compile(_WEAK_SEPARATOR, re.IGNORECASE)
+
+# Question scaffolding around the products, stripped from the ends of the prompt
+LEAD_RE = re.compile(
+    r"^\s*(?:please\s+)?(?:can\s+you\s+)?(?:compare|comparison\s+of|(?:what(?:'s|\s+is)\s+the\s+)?difference\s+between"
+    r"|which\s+is\s+(?:better|healthier)(?:\s*[,:]\s*|\s+)?(?:between\s+)?|is|are|should\s+i\s+(?:eat|buy|get|choose))\b[\s,:]*",
+    re.IGNORECASE,
+)
+TAIL_RE = re.compile(
+    r"[\s,]*(?:side[\s-]+by[\s-]+side|which\s+(?:one\s+)?is\s+(?:better|healthier)|(?:for|in)\s+(?:me|health)"
+    r"|nutrition(?:ally)?|(?:is\s+)?(?:better|healthier))?\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+QUANTITY_RE = re.compile(
+    r"^(?P<amount>\d+(?:[.,]\d+)?|an?|one|two|three)\s*"
+    r"(?P<unit>g|grams?|kg|ml|l|litres?|liters?|oz|cups?|cans?|bottles?|slices?|pieces?|bars?|servings?|tbsp|tsp)?"
+    r"(?:\s+of)?\s+",
+    re.IGNORECASE,
+)
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3}
+
+MODIFIERS = frozenset("""
+diet zero light lite organic sugar-free unsweetened sweetened low-fat fat-free reduced-fat skimmed
+semi-skimmed whole wholegrain whole-wheat low-sugar no-sugar decaf gluten-free lactose-free vegan raw
+plain salted unsalted original
+""".split())
+
+# Safety questions: clauses about the user ("I'm diabetic, ...") name no product;
+# in the rest, the product sits between the question lead and the safety cue.
+CLAUSE_SEPARATOR_RE = re.compile(r"[,;:?!]+|\.(?=\s|$)|\s+(?:but|so)\s+", re.IGNORECASE)
+ABOUT_USER_RE = re.compile(r"^\s*(?:i|i'm|im|i've|my)\b", re.IGNORECASE)
+SAFETY_LEAD_RE = re.compile(
+    r"^\s*(?:please\s+)?(?:(?:is|are|does|do|would|will)\s+(?:it|they)?\s*(?:safe|ok(?:ay)?|fine)\s+to\s+(?:eat|have|drink)"
+    r"|(?:can|could|should|may)\s+(?:i|we|my\s+\w+)\s+(?:safely\s+)?(?:eat|have|drink|try|buy|give\s+\w+)"
+    r"|(?:check|how\s+safe\s+is|what\s+about|tell\s+me\s+if)"
+    r"|(?:any\s+)?(?:allergens?|risks?|warnings?|dangers?)\s+(?:in|of|with|for)"
+    r"|is|are|does|do|would|will)\b\s*",
+    re.IGNORECASE,
+)
+SAFETY_CUE_RE = re.compile(
+    r"\s*\b(?:(?:really|actually|still|too)\s+)?(?:safe|safety|ok(?:ay)?|fine|bad|good|suitable|dangerous|harmful"
+    r"|healthy|risky|allowed|vegan|vegetarian|halal|kosher|contains?|have|has|for|if|when|with|given|during|while)\b.*$",
+    re.IGNORECASE,
+)
+
+# Nutrition questions: everything that is not the food itself
+NUTRITION_WORDS = frozenset("""
+nutrition nutritional nutrients nutrient info information facts fact calories calorie kcal protein sugar sugars
+carbs carbohydrates fat fats fibre fiber macros content value values much many per serving servings g grams
+100g does do have has contain contains tell show give
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+
+def _mention(text):
+    text = text.strip(" \t,.;:!?\"'")
+    amount = unit = None
+    match = QUANTITY_RE.match(text + " ")
+    if match and (match.group("unit") or match.group("amount")[0].isdigit()):
+        raw = match.group("amount").lower()
+        amount = float(WORD_NUMBERS.get(raw, raw.replace(",", ".")))
+        unit = (match.group("unit") or "").lower() or None
+        text = text[match.end():].strip()
+    elif match and match.group("amount").lower() in ("a", "an"):
+        text = text[match.end():].strip()
+    words = _WORD_RE.findall(text.lower())
+    if not any(w not in STOPWORDS for w in words):
+        return None
+    return {
+        "text": text,
+        "name": " ".join(words),
+        "quantity": amount,
+        "unit": unit,
+        "modifiers": [w for w in words if w in MODIFIERS],
+    }
+
+
+def parse_comparison(prompt):
+    """Product mentions in a comparison prompt, in the order they appear.
+
+    Each mention is ``{"text", "name", "quantity", "unit", "modifiers"}``;
+    ``name`` is the normalized search string (modifiers included, since
+    "diet coke" is a different product from "coke"). Fragments that hold
+    no product words are dropped.
+    """
+    body = TAIL_RE.sub("", LEAD_RE.sub("", prompt, count=1), count=1)
+    parts = STRONG_SEPARATOR_RE.split(body)
+    if len(parts) < 2:
+        parts = WEAK_SEPARATOR_RE.split(body)
+    mentions = []
+    for part in parts:
+        mention = _mention(part)
+        if mention:
+            mentions.append(mention)
+    return mentions
+
+
+def product_mention(prompt):
+    """The product a safety question is about, as a mention dict, or None.
+
+    "I'm diabetic, can I eat nutella?" -> ``{"name": "nutella", ...}``; a
+    question that names no product ("is this safe for me?") gives None.
+    """
+    for clause in CLAUSE_SEPARATOR_RE.split(prompt):
+        if not clause.strip() or ABOUT_USER_RE.match(clause):
+            continue
+        span = SAFETY_CUE_RE.sub("", SAFETY_LEAD_RE.sub("", clause, count=1), count=1)
+        mention = _mention(span)
+        if mention:
+            return mention
+    return None
+
+
+def nutrition_subject(prompt):
+    """The food a nutrition question asks about, as a search string, or None.
+
+    "how much protein in greek yogurt?" -> ``"greek yogurt"``.
+    """
+    words = [w for w in _WORD_RE.findall(prompt.lower()) if w not in NUTRITION_WORDS and w not in STOPWORDS]
+    return " ".join(words) or None
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# (nutriment key per 100g, threshold, points added when the value exceeds it)
+HEALTH_RULES = [
+    ('proteins_100g', 10, 15),
+    ('fiber_100g', 3, 10),
+    ('sugars_100g', 15, -15),
+    ('saturated-fat_100g', 5, -10),
+    ('sodium_100g', 0.5, -10),
+]
+BASE_SCORE = 50
+
+# Column names used by foods.csv for the nutriments it carries
+FOODS_CSV_COLUMNS = {
+    'proteins_100g': 'protein',
+    'sugars_100g': 'sugar',
+    'sodium_100g': 'sodium',
+}
+
+
+def calculate_health_score(nutriments):
+    """Calculate a simple health score based on nutrients"""
+    score = BASE_SCORE
+    for key, threshold, points in HEALTH_RULES:
+        if nutriments.get(key, 0) > threshold:
+            score += points
+    return max(0, min(100, score))
+
+
+def _column(data, name, n):
+    if name not in data:
+        return None
+    values = data[name]
+    array = np.asarray(values)
+    if array.dtype.kind not in "biuf":
+        array = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if array.shape != (n,):
+        raise ValueError(f"column {name!r} has shape {array.shape}, expected ({n},)")
+    return array
+
+
+def calculate_health_scores(data, columns=None):
+    """Vectorized ``calculate_health_score`` over many products at once.
+
+    ``data`` is a DataFrame or a mapping of equal-length arrays keyed by
+    OFF nutriment names; ``columns`` maps OFF names to other column names
+    (e.g. ``FOODS_CSV_COLUMNS``). Missing columns and NaNs count as 0,
+    exactly like a missing key in the scalar version, so the two agree
+    product for product. Returns an int64 array.
+    """
+    columns = columns or {}
+    if isinstance(data, pd.DataFrame):
+        n = len(data)
+    else:
+        n = len(next(iter(data.values()))) if data else 0
+    scores = np.full(n, BASE_SCORE, dtype=np.int64)
+    for key, threshold, points in HEALTH_RULES:
+        values = _column(data, columns.get(key, key), n)
+        if values is not None:
+            # NaN compares False, same as the scalar default of 0
+            scores += np.where(values > threshold, points, 0)
+    return np.clip(scores, 0, 100)
+
+
+def rank_by_health(df, k=10, columns=None):
+    """Top ``k`` rows of ``df`` by health score, best first, with a ``health_score`` column"""
+    scores = calculate_health_scores(df, columns)
+    k = min(k, len(scores))
+    if k <= 0:
+        return df.iloc[:0].assign(health_score=scores[:0])
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return df.iloc[top].assign(health_score=scores[top])
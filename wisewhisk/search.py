@@ -0,0 +1,231 @@
+import heapq
+import re
+from collections import defaultdict
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no product identity in chat prompts
+STOPWORDS = frozenset("""
+a an and about any are can does for from give how i in info is it me my of on or please show
+tell the there this to what whats which with
+""".split())
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def max_edits(token):
+    """Typo budget for a token: none for very short words, two for long ones"""
+    n = len(token)
+    return 0 if n < 3 else 1 if n < 6 else 2
+
+
+def deletes(word, distance):
+    """Every string reachable from ``word`` by up to ``distance`` deletions"""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b, limit):
+    """Optimal-string-alignment distance, or ``limit + 1`` once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+def trigrams(text):
+    """Word-padded character trigrams, so matches prefer word boundaries"""
+    grams = set()
+    for word in _TOKEN_RE.findall(str(text).lower()):
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """In-memory product-name index for ranked lookups.
+
+    Keeps an inverted index of normalized tokens plus a trigram index for
+    substring/typo matches. A query only visits the postings of its own
+    tokens and trigrams, never the whole catalog. Entries can be added
+    incrementally and removed again; duplicate names keep their first payload.
+
+    Query words that aren't in the vocabulary are corrected SymSpell-style
+    ("yoghurt" -> "yogurt") from a symmetric-delete index over the first
+    ``PREFIX_LENGTH`` characters of every indexed word, or split into two
+    known words ("peanutbutter" -> "peanut butter"). Both cost a bounded
+    number of dict lookups per query word, whatever the catalog size.
+    """
+
+    PREFIX_LENGTH = 7
+    CORRECTED_WEIGHT = 0.9
+
+    def __init__(self):
+        self.names = []
+        self.payloads = []
+        self._token_counts = []
+        self._trigram_counts = []
+        self._by_name = {}
+        self._tokens = defaultdict(list)
+        self._trigrams = defaultdict(list)
+        self._deletes = defaultdict(set)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def add(self, name, payload=None):
+        """Index ``name``; returns its document id"""
+        key = " ".join(str(name).lower().split())
+        if not key:
+            return None
+        if key in self._by_name:
+            return self._by_name[key]
+        doc = len(self.names)
+        self._by_name[key] = doc
+        self.names.append(str(name))
+        self.payloads.append(payload)
+        tokens = set(tokenize(key))
+        grams = trigrams(key)
+        self._token_counts.append(len(tokens))
+        self._trigram_counts.append(len(grams))
+        for token in tokens:
+            if token not in self._tokens:
+                for variant in deletes(token[:self.PREFIX_LENGTH], max_edits(token)):
+                    self._deletes[variant].add(token)
+            self._tokens[token].append(doc)
+        for gram in grams:
+            self._trigrams[gram].append(doc)
+        return doc
+
+    def remove(self, name):
+        """Drop ``name`` from every posting list; returns whether it was indexed"""
+        key = " ".join(str(name).lower().split())
+        doc = self._by_name.pop(key, None)
+        if doc is None:
+            return False
+        # The id stays taken so the other documents keep theirs
+        self.names[doc] = self.payloads[doc] = None
+        for token in set(tokenize(key)):
+            postings = self._tokens[token]
+            postings.remove(doc)
+            if not postings:
+                del self._tokens[token]
+                for variant in deletes(token[:self.PREFIX_LENGTH], max_edits(token)):
+                    self._deletes[variant].discard(token)
+                    if not self._deletes[variant]:
+                        del self._deletes[variant]
+        for gram in trigrams(key):
+            postings = self._trigrams[gram]
+            postings.remove(doc)
+            if not postings:
+                del self._trigrams[gram]
+        return True
+
+    def correct(self, token):
+        """Closest indexed word within the typo budget of ``token``, or None"""
+        if token in self._tokens:
+            return token
+        limit = max_edits(token)
+        if not limit:
+            return None
+        best = None
+        for variant in deletes(token[:self.PREFIX_LENGTH], limit):
+            for candidate in self._deletes.get(variant, ()):
+                d = edit_distance(token, candidate, limit)
+                if d <= limit:
+                    # Closest first, then the word used by more names
+                    rank = (d, -len(self._tokens[candidate]), candidate)
+                    if best is None or rank < best:
+                        best = rank
+        return best[2] if best else None
+
+    def _expand(self, token):
+        """Indexed words for one query word, with their weights"""
+        if token in self._tokens:
+            return [(token, 1.0)]
+        corrected = self.correct(token)
+        if corrected:
+            return [(corrected, self.CORRECTED_WEIGHT)]
+        for i in range(3, len(token) - 2):
+            head, tail = token[:i], token[i:]
+            if head in self._tokens and tail in self._tokens:
+                return [(head, self.CORRECTED_WEIGHT), (tail, self.CORRECTED_WEIGHT)]
+        return [(token, 1.0)]
+
+    def search(self, query, k=5, min_score=0.5, exact=False):
+        """Return up to ``k`` ``(score, name, payload)`` tuples, best first.
+
+        The token score averages how much of the name and how much of the
+        query overlap, so both "yogurt" and "tell me about greek yogurt" find
+        "Greek Yogurt"; corrected or split words count slightly less than
+        exact ones. The trigram score catches partial words.
+
+        With ``exact``, only names whose every word matches a query word and
+        the other way round are returned, so "butter" does not find
+        "Organic Peanut Butter".
+        """
+        q_tokens = set(tokenize(query))
+        q_grams = trigrams(" ".join(q_tokens))
+        terms = {}
+        sources = defaultdict(set)
+        for token in q_tokens:
+            for term, weight in self._expand(token):
+                terms[term] = max(weight, terms.get(term, 0))
+                sources[term].add(token)
+        scores = {}
+
+        shared = defaultdict(float)
+        matched = defaultdict(set)
+        for term, weight in terms.items():
+            for doc in self._tokens.get(term, ()):
+                shared[doc] += weight
+                matched[doc].add(term)
+        for doc, n in shared.items():
+            if exact and (len(matched[doc]) < self._token_counts[doc]
+                          or len(set().union(*(sources[t] for t in matched[doc]))) < len(q_tokens)):
+                continue
+            scores[doc] = (n / self._token_counts[doc] + n / len(terms)) / 2
+
+        shared = defaultdict(int)
+        # Partial words never make an exact match
+        for gram in () if exact else q_grams:
+            for doc in self._trigrams.get(gram, ()):
+                shared[doc] += 1
+        for doc, n in shared.items():
+            # Containment in either direction: name inside query or query inside name
+            score = 0.9 * max(n / self._trigram_counts[doc], n / len(q_grams))
+            if score > scores.get(doc, 0):
+                scores[doc] = score
+
+        ranked = heapq.nsmallest(k, ((-s, doc) for doc, s in scores.items() if s >= min_score))
+        return [(round(-s, 4), self.names[doc], self.payloads[doc]) for s, doc in ranked]
+
+    def best(self, query, min_score=0.5):
+        """Payload of the top hit, or None"""
+        hits = self.search(query, k=1, min_score=min_score)
+        return hits[0][2] if hits else None
+
+
+def build_name_index(df, column="name"):
+    """Index every row of ``df`` by name, with the row label as payload"""
+    index = NameIndex()
+    if column in df.columns:
+        for label, name in df[column].items():
+            if isinstance(name, str):
+                index.add(name, label)
+    return index
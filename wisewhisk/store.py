@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import threading
+
+from wisewhisk.connections import ThreadLocalConnection
+
+DEFAULT_DB_PATH = os.environ.get(
+    "WISEWHISK_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "products.db"),
+)
+
+# Read-only connections map this much of the file instead of copying pages
+# into a private cache, so every worker process shares one copy in RAM
+MMAP_SIZE = 1 << 30
+
+# Column name -> Open Food Facts nutriment key (per 100g)
+NUTRIMENT_COLUMNS = {
+    "energy_kcal": "energy-kcal_100g",
+    "energy_kj": "energy-kj_100g",
+    "fat": "fat_100g",
+    "saturated_fat": "saturated-fat_100g",
+    "carbohydrates": "carbohydrates_100g",
+    "sugars": "sugars_100g",
+    "fiber": "fiber_100g",
+    "proteins": "proteins_100g",
+    "salt": "salt_100g",
+    "sodium": "sodium_100g",
+    "fruit_veg": "fruits-vegetables-nuts_100g",
+}
+
+# Columns OFF reports under several keys, best first
+FALLBACK_KEYS = {
+    "energy_kj": ["energy-kj_100g", "energy_100g"],
+    "fruit_veg": ["fruits-vegetables-nuts_100g", "fruits-vegetables-nuts-estimate-from-ingredients_100g",
+                  "fruits-vegetables-legumes-estimate-from-ingredients_100g"],
+}
+
+TEXT_COLUMNS = ["product_name", "brands", "categories", "ingredients_text", "allergens",
+                "nutriscore_grade", "image_url"]
+
+COLUMNS = ["code", "name_key"] + TEXT_COLUMNS + list(NUTRIMENT_COLUMNS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    code TEXT PRIMARY KEY,
+    name_key TEXT,
+    product_name TEXT,
+    brands TEXT,
+    categories TEXT,
+    ingredients_text TEXT,
+    allergens TEXT,
+    nutriscore_grade TEXT,
+    image_url TEXT,
+    energy_kcal REAL,
+    energy_kj REAL,
+    fat REAL,
+    saturated_fat REAL,
+    carbohydrates REAL,
+    sugars REAL,
+    fiber REAL,
+    proteins REAL,
+    salt REAL,
+    sodium REAL,
+    fruit_veg REAL
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS products_name_key ON products(name_key);
+CREATE INDEX IF NOT EXISTS products_nutriscore ON products(nutriscore_grade);
+"""
+
+
+def name_key(name):
+    """Normalized form of a product name used for indexed lookups"""
+    return " ".join(str(name or "").lower().split())
+
+
+def as_number(value):
+    """``float(value)``, or None for missing, unparsable and NaN values"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value else None
+
+
+def product_to_row(product):
+    """Flatten an OFF product document into a ``products`` row tuple"""
+    nutriments = product.get('nutriments') or {}
+    grade = str(product.get('nutriscore_grade') or "").lower()
+    allergens = product.get('allergens_tags')
+    row = {
+        "code": str(product.get('code') or product.get('_id') or "").strip(),
+        "name_key": name_key(product.get('product_name')),
+        "product_name": product.get('product_name') or None,
+        "brands": product.get('brands') or None,
+        "categories": product.get('categories') or None,
+        "ingredients_text": product.get('ingredients_text') or None,
+        "allergens": ",".join(allergens) if isinstance(allergens, list) else product.get('allergens') or None,
+        "nutriscore_grade": grade if grade in ("a", "b", "c", "d", "e") else None,
+        "image_url": product.get('image_url') or None,
+    }
+    for column, key in NUTRIMENT_COLUMNS.items():
+        for candidate in FALLBACK_KEYS.get(column, [key]):
+            row[column] = as_number(nutriments.get(candidate))
+            if row[column] is not None:
+                break
+    return tuple(row[c] for c in COLUMNS)
+
+
+def row_to_product(row):
+    """Inverse of ``product_to_row``: rebuild the OFF-shaped dict the UI renders"""
+    product = {k: row[k] for k in ["code"] + TEXT_COLUMNS if row[k] is not None}
+    product['nutriments'] = {key: row[column] for column, key in NUTRIMENT_COLUMNS.items()
+                             if row[column] is not None}
+    return product
+
+
+class ProductStore(ThreadLocalConnection):
+    """Read-mostly SQLite store of Open Food Facts products.
+
+    Built offline by ``process_data.py``; the app opens it read-only and
+    answers barcode and name lookups from it before touching the network.
+    Each thread gets its own connection.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, readonly=True):
+        self.path = path
+        self.readonly = readonly
+        super().__init__()
+
+    def connect(self):
+        if self.readonly:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        else:
+            conn = sqlite3.connect(self.path)
+            conn.executescript(SCHEMA)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Writing (ingestion) ---
+    def insert_many(self, rows):
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO products ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            rows,
+        )
+        self.conn.commit()
+
+    def fill_nutriscores(self, chunk_size=50000):
+        """Compute Nutri-Score grades for every product OFF didn't grade, in batches.
+
+        Returns the number of products that received a grade.
+        """
+        from wisewhisk.nutriscore import compute_nutriscores
+
+        columns = list(NUTRIMENT_COLUMNS)
+        filled = 0
+        last = ""
+        while True:
+            rows = self.conn.execute(
+                f"SELECT code, {', '.join(columns)} FROM products "
+                "WHERE nutriscore_grade IS NULL AND code > ? ORDER BY code LIMIT ?",
+                (last, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            data = {NUTRIMENT_COLUMNS[c]: [r[i + 1] for r in rows] for i, c in enumerate(columns)}
+            _, grades = compute_nutriscores(data)
+            updates = [(grade, row[0]) for grade, row in zip(grades, rows) if grade is not None]
+            self.conn.executemany("UPDATE products SET nutriscore_grade = ? WHERE code = ?", updates)
+            self.conn.commit()
+            filled += len(updates)
+        return filled
+
+    def finalize(self):
+        """Create indexes and compact; call once after a bulk load"""
+        self.conn.executescript(INDEXES)
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+
+    # --- Reading ---
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def get(self, code):
+        """Return the product for a barcode, or None"""
+        row = self.conn.execute("SELECT * FROM products WHERE code = ?", (str(code).strip(),)).fetchone()
+        return row_to_product(row) if row else None
+
+    def search(self, query, limit=1):
+        """Exact-then-prefix name lookup; both are served by the name_key index"""
+        key = name_key(query)
+        if not key:
+            return []
+        rows = self.conn.execute(
+            "SELECT * FROM products WHERE name_key = ? LIMIT ?", (key, limit)
+        ).fetchall()
+        if len(rows) < limit:
+            rows += self.conn.execute(
+                "SELECT * FROM products WHERE name_key > ? AND name_key < ? LIMIT ?",
+                (key, key + "\uffff", limit - len(rows)),
+            ).fetchall()
+        return [row_to_product(r) for r in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the shared read-only store, or None if no database has been built"""
+    global _store
+    if _store is None and os.path.exists(DEFAULT_DB_PATH):
+        with _store_lock:
+            if _store is None:
+                _store = ProductStore(DEFAULT_DB_PATH)
+    return _store
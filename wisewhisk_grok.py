@@ -1,15 +1,25 @@
 import streamlit as st
 import pandas as pd
 import json
-import requests
-import os
 from PIL import Image
 import plotly.graph_objects as go
 import base64
 from datetime import datetime
-import re
 import speech_recognition as sr
 
+from wisewhisk.additives import DEFAULT_INDEX as ADDITIVE_INDEX
+from wisewhisk.allergens import ALLERGEN_LEXICON
+from wisewhisk.analysis import analyze_ingredients, analyze_product, infer_intent
+from wisewhisk.charts import nutri_score_gauge, prerender_gauges
+from wisewhisk.export import export_bytes
+from wisewhisk.custom_ingredients import custom_frame, get_custom_store
+from wisewhisk.foods import load_foods
+from wisewhisk.local_foods import LOCAL_MATCH_SCORE, LocalFoods
+from wisewhisk.openfoodfacts import fetch_open_food_facts, lookup_products, search_open_food_facts, search_products
+from wisewhisk.product import format_amount
+from wisewhisk.queries import nutrition_subject, parse_comparison
+from wisewhisk.scoring import FOODS_CSV_COLUMNS, calculate_health_score, rank_by_health
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="WiseWhisk - Intelligent Ingredient Co-Pilot",
@@ -331,8 +341,6 @@ if 'history' not in st.session_state:
     st.session_state.history = []
 if 'profile' not in st.session_state:
     st.session_state.profile = {"goals": "Stay healthy and active", "allergies": [], "dietary_preferences": []}
-if 'custom_ingredients' not in st.session_state:
-    st.session_state.custom_ingredients = []
 if 'messages' not in st.session_state:
     st.session_state.messages = [
         {"role": "assistant", "content": """👋 **Welcome to WiseWhisk** - Your Intelligent Ingredient Co-Pilot!
@@ -355,120 +363,25 @@ if 'comparisons_made' not in st.session_state:
     st.session_state.comparisons_made = 0
 
 # --- Helper Functions ---
-@st.cache_data
-def load_optimized_data():
-    """Load local food database"""
-    if os.path.exists("foods.csv"):
-        return pd.read_csv("foods.csv")
-    return pd.DataFrame(columns=["name", "calories", "fat", "sugar", "protein", "sodium", "labels"])
-
-def fetch_open_food_facts(barcode):
-    """Fetch product data by barcode"""
-    url = f"https://world.openfoodfacts.org/api/v2/product/{barcode}.json"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        return None
-    return None
+# Custom ingredients live in SQLite, shared by every session and kept across restarts
+CUSTOM_STORE = get_custom_store()
 
-def search_open_food_facts(query):
-    """Search for products by name"""
-    url = f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={query}&search_simple=1&action=process&json=1"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('products'):
-                return data['products'][0]
-    except:
-        return None
-    return None
-
-def parse_ingredient_list(raw_text):
-    """Parse raw ingredient list into structured data"""
-    text = re.sub(r'^(ingredients?:?|contains:?)', '', raw_text.lower(), flags=re.IGNORECASE).strip()
-    ingredients = re.split(r'[,;]|\sand\s', text)
-    parsed = []
-    for ing in ingredients:
-        cleaned = ing.strip()
-        if cleaned and len(cleaned) > 2:
-            parsed.append(cleaned.title())
-    return parsed
+@st.cache_resource
+def load_optimized_data():
+    """Load local food database (deduplicated, typed, memory-mapped)"""
+    return load_foods("foods.csv")
 
-def check_allergens(ingredients, user_allergies):
-    """Check if any allergens are present"""
-    if not user_allergies:
-        return []
-    
-    allergen_keywords = {
-        "Peanuts": ["peanut", "groundnut"],
-        "Dairy": ["milk", "cheese", "butter", "cream", "whey", "casein", "lactose"],
-        "Gluten": ["wheat", "barley", "rye", "gluten"],
-        "Soy": ["soy", "soybean", "tofu"],
-        "Eggs": ["egg", "albumin"]
-    }
-    
-    detected = []
-    for allergen in user_allergies:
-        keywords = allergen_keywords.get(allergen, [allergen.lower()])
-        for keyword in keywords:
-            if any(keyword in str(ing).lower() for ing in ingredients):
-                detected.append(allergen)
-                break
-    
-    return list(set(detected))
+@st.cache_resource
+def load_local_foods():
+    """Local food database and custom ingredients behind one name index, built once per process"""
+    return LocalFoods(load_optimized_data(), CUSTOM_STORE)
 
-def infer_intent(query):
-    """Infer user intent from query"""
-    query = query.lower()
-    if any(word in query for word in ["compare", "vs", "versus", "difference", "better than", "side by side"]):
-        return "comparison"
-    elif any(word in query for word in ["safe", "diabetic", "allergic", "risk", "bad for", "warning", "danger"]):
-        return "safety_check"
-    elif any(word in query for word in ["nutrition", "calories", "info", "protein", "sugar", "carbs", "nutrients"]):
-        return "nutrition_info"
-    else:
-        return "general_query"
+@st.cache_resource
+def prerender_charts():
+    """Build every Nutri-Score gauge once per process, so no chat reply waits on one"""
+    prerender_gauges(("enhanced",))
 
-def generate_enhanced_nutri_score_viz(score, product_data=None):
-    """Enhanced Nutri-Score visualization with breakdown"""
-    colors = {'A': '#038141', 'B': '#85BB2F', 'C': '#FECB02', 'D': '#EE8100', 'E': '#E63E11'}
-    score = score.upper() if score and score.upper() in colors else 'C'
-    
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=ord('E') - ord(score),
-        domain={'x': [0, 1], 'y': [0, 1]},
-        title={'text': f"Nutri-Score: {score}", 'font': {'size': 24, 'color': '#1e5666', 'family': 'Inter'}},
-        gauge={
-            'axis': {'range': [0, 4], 'tickvals': [0, 1, 2, 3, 4], 'ticktext': ['E', 'D', 'C', 'B', 'A']},
-            'bar': {'color': colors.get(score, 'gray'), 'thickness': 0.8},
-            'steps': [
-                {'range': [0, 0.8], 'color': 'rgba(230, 62, 17, 0.3)'},
-                {'range': [0.8, 1.8], 'color': 'rgba(238, 129, 0, 0.3)'},
-                {'range': [1.8, 2.8], 'color': 'rgba(254, 203, 2, 0.3)'},
-                {'range': [2.8, 3.8], 'color': 'rgba(133, 187, 47, 0.3)'},
-                {'range': [3.8, 4], 'color': 'rgba(3, 129, 65, 0.3)'},
-            ],
-            'threshold': {
-                'line': {'color': "white", 'width': 4},
-                'thickness': 0.75,
-                'value': ord('E') - ord(score)
-            }
-        }
-    ))
-    
-    fig.update_layout(
-        height=250,
-        margin=dict(l=20, r=20, t=60, b=20),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font={'family': 'Inter'}
-    )
-    
-    return fig
+prerender_charts()
 
 def add_to_history(action_type, details):
     """Add detailed action to history"""
@@ -479,28 +392,10 @@ def add_to_history(action_type, details):
         "details": details
     })
 
-def calculate_health_score(nutriments):
-    """Calculate a simple health score based on nutrients"""
-    score = 50
-    
-    if nutriments.get('proteins_100g', 0) > 10:
-        score += 15
-    if nutriments.get('fiber_100g', 0) > 3:
-        score += 10
-    
-    if nutriments.get('sugars_100g', 0) > 15:
-        score -= 15
-    if nutriments.get('saturated-fat_100g', 0) > 5:
-        score -= 10
-    if nutriments.get('sodium_100g', 0) > 0.5:
-        score -= 10
-    
-    return max(0, min(100, score))
-
 def get_database_stats():
     """Get statistics about the database"""
     df = load_optimized_data()
-    custom_count = len(st.session_state.custom_ingredients)
+    custom_count = len(CUSTOM_STORE)
     
     stats = {
         "total_items": len(df) + custom_count,
@@ -617,7 +512,7 @@ if menu == "🏠 Command Center":
     with col4:
         st.markdown(f"""
         <div class="metric-tile">
-            <div class="metric-value">{len(st.session_state.custom_ingredients)}</div>
+            <div class="metric-value">{len(CUSTOM_STORE)}</div>
             <div class="metric-label">Custom Items</div>
         </div>
         """, unsafe_allow_html=True)
@@ -697,22 +592,21 @@ elif menu == "💬 Chat Interface":
             if intent == "comparison":
                 st.markdown("### ⚖️ Enhanced Product Comparison")
                 
-                items = prompt.lower().replace("compare", "").replace("versus", "vs").replace("side by side", "").split(" vs ")
-                if len(items) < 2:
-                    items = prompt.lower().split(" and ")
+                items = [m['name'] for m in parse_comparison(prompt)]
+                if len(items) > 2:
+                    st.caption(f"Comparing the first two of: {', '.join(items)}")
                 
                 if len(items) >= 2:
-                    item1, item2 = items[0].strip(), items[1].strip()
+                    item1, item2 = items[0], items[1]
                     
                     with st.spinner("🔍 Fetching product data from Open Food Facts..."):
-                        d1 = search_open_food_facts(item1)
-                        d2 = search_open_food_facts(item2)
+                        d1, d2 = lookup_products([item1, item2])
                     
                     if d1 and d2:
                         st.session_state.comparisons_made += 1
                         
-                        score1 = calculate_health_score(d1.get('nutriments', {}))
-                        score2 = calculate_health_score(d2.get('nutriments', {}))
+                        score1 = calculate_health_score(d1.nutriments)
+                        score2 = calculate_health_score(d2.nutriments)
                         
                         st.markdown('<div class="vs-container"><div class="vs-badge">VS</div></div>', unsafe_allow_html=True)
                         
@@ -726,13 +620,13 @@ elif menu == "💬 Chat Interface":
                             """, unsafe_allow_html=True)
                             
                             if d1.get('nutriscore_grade'):
-                                st.plotly_chart(generate_enhanced_nutri_score_viz(d1.get('nutriscore_grade')), use_container_width=True)
+                                st.plotly_chart(nutri_score_gauge(d1.get('nutriscore_grade')), use_container_width=True, key="gauge_d1")
                             
                             st.markdown(f"""
-                            **Calories:** {d1.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal/100g  
-                            **Protein:** {d1.get('nutriments', {}).get('proteins_100g', 'N/A')} g  
-                            **Sugar:** {d1.get('nutriments', {}).get('sugars_100g', 'N/A')} g  
-                            **Fat:** {d1.get('nutriments', {}).get('fat_100g', 'N/A')} g  
+                            **Calories:** {format_amount(d1.nutriments.energy_kcal)} kcal/100g  
+                            **Protein:** {format_amount(d1.nutriments.proteins)} g  
+                            **Sugar:** {format_amount(d1.nutriments.sugars)} g  
+                            **Fat:** {format_amount(d1.nutriments.fat)} g  
                             **Health Score:** {score1}/100
                             """)
                             
@@ -749,13 +643,13 @@ elif menu == "💬 Chat Interface":
                             """, unsafe_allow_html=True)
                             
                             if d2.get('nutriscore_grade'):
-                                st.plotly_chart(generate_enhanced_nutri_score_viz(d2.get('nutriscore_grade')), use_container_width=True)
+                                st.plotly_chart(nutri_score_gauge(d2.get('nutriscore_grade')), use_container_width=True, key="gauge_d2")
                             
                             st.markdown(f"""
-                            **Calories:** {d2.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal/100g  
-                            **Protein:** {d2.get('nutriments', {}).get('proteins_100g', 'N/A')} g  
-                            **Sugar:** {d2.get('nutriments', {}).get('sugars_100g', 'N/A')} g  
-                            **Fat:** {d2.get('nutriments', {}).get('fat_100g', 'N/A')} g  
+                            **Calories:** {format_amount(d2.nutriments.energy_kcal)} kcal/100g  
+                            **Protein:** {format_amount(d2.nutriments.proteins)} g  
+                            **Sugar:** {format_amount(d2.nutriments.sugars)} g  
+                            **Fat:** {format_amount(d2.nutriments.fat)} g  
                             **Health Score:** {score2}/100
                             """)
                             
@@ -771,10 +665,10 @@ elif menu == "💬 Chat Interface":
                     
                     elif d1:
                         st.warning(f"Found data for {item1}, but couldn't find {item2} in Open Food Facts database.")
-                        st.markdown(f"**{d1.get('product_name', item1.title())}** - {d1.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal/100g")
+                        st.markdown(f"**{d1.get('product_name', item1.title())}** - {format_amount(d1.nutriments.energy_kcal)} kcal/100g")
                     elif d2:
                         st.warning(f"Found data for {item2}, but couldn't find {item1} in Open Food Facts database.")
-                        st.markdown(f"**{d2.get('product_name', item2.title())}** - {d2.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal/100g")
+                        st.markdown(f"**{d2.get('product_name', item2.title())}** - {format_amount(d2.nutriments.energy_kcal)} kcal/100g")
                     else:
                         st.error("❌ Couldn't find either product in the Open Food Facts database. Try using the barcode scanner or check the product names.")
                         response_text = "I couldn't find data for those products. Try scanning their barcodes using the '📸 Scan Label' feature!"
@@ -786,11 +680,11 @@ elif menu == "💬 Chat Interface":
                 st.markdown("### 🛡️ Safety Analysis")
                 
                 with st.spinner("Analyzing safety for your profile..."):
-                    data = search_open_food_facts(prompt.split()[-1])
+                    data = load_local_foods().find_mentioned_product(prompt)
                 
                 if data:
-                    ingredients = parse_ingredient_list(data.get('ingredients_text', ''))
-                    allergens = check_allergens(ingredients, st.session_state.profile['allergies'])
+                    verdict = analyze_product(data, st.session_state.profile['allergies'])
+                    allergens = verdict['allergens']
                     
                     if allergens:
                         st.markdown(f"""
@@ -807,12 +701,11 @@ elif menu == "💬 Chat Interface":
                         st.success("✅ No allergens detected based on your profile!")
                         response_text = "✅ This product appears safe for your dietary restrictions. No allergens detected!"
                     
-                    nutriments = data.get('nutriments', {})
-                    if nutriments.get('sugars_100g', 0) > 15:
+                    if verdict['high_sugar']:
                         st.warning("⚠️ High sugar content detected - may not be suitable for diabetics")
                         response_text += "\n\n⚠️ High sugar content - exercise caution if diabetic."
                     
-                    if nutriments.get('sodium_100g', 0) > 0.5:
+                    if verdict['high_sodium']:
                         st.warning("⚠️ High sodium content - may affect blood pressure")
                         response_text += "\n\n⚠️ High sodium - monitor if you have blood pressure concerns."
                     
@@ -825,10 +718,30 @@ elif menu == "💬 Chat Interface":
             elif intent == "nutrition_info":
                 st.markdown("### 📊 Nutrition Information")
                 
-                with st.spinner("Fetching nutrition data from Open Food Facts..."):
-                    data = search_open_food_facts(prompt)
+                # Local foods and custom ingredients first; Open Food Facts unless one matches word for word
+                subject = nutrition_subject(prompt) or prompt
+                food = load_local_foods().find(subject, min_score=LOCAL_MATCH_SCORE, exact=True)
+                matches = []
+                if food is None:
+                    with st.spinner("Fetching nutrition data from Open Food Facts..."):
+                        matches = search_products(subject, k=5)['products']
+                data = matches[0] if matches else None
                 
-                if data:
+                if food is not None:
+                    st.markdown(f"""
+                    <div class="glass-card">
+                        <h4>{food['name']}</h4>
+                        <p><strong>Calories:</strong> {format_amount(food['calories'])} kcal</p>
+                        <p><strong>Protein:</strong> {format_amount(food['protein'])}g</p>
+                        <p><strong>Fat:</strong> {format_amount(food['fat'])}g</p>
+                        <p><strong>Sugar:</strong> {format_amount(food['sugar'])}g</p>
+                        <p><strong>Labels:</strong> {food['labels']}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    response_text = f"📊 From local database: **{food['name']}** has {format_amount(food['calories'])} kcal, {format_amount(food['protein'])}g protein. Labels: {food['labels']}"
+                    st.session_state.messages.append({"role": "assistant", "content": response_text})
+                elif data:
                     st.markdown(f"""
                     <div class="glass-card">
                         <h3 style="color: #1e5666; margin-top: 0;">{data.get('product_name', 'Product')}</h3>
@@ -837,67 +750,50 @@ elif menu == "💬 Chat Interface":
                     """, unsafe_allow_html=True)
                     
                     if data.get('nutriscore_grade'):
-                        st.plotly_chart(generate_enhanced_nutri_score_viz(data.get('nutriscore_grade')), use_container_width=True)
+                        st.plotly_chart(nutri_score_gauge(data.get('nutriscore_grade')), use_container_width=True)
                     
-                    nutriments = data.get('nutriments', {})
+                    nutriments = data.nutriments
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
-                        st.metric("Calories", f"{nutriments.get('energy-kcal_100g', 'N/A')} kcal")
-                        st.metric("Protein", f"{nutriments.get('proteins_100g', 'N/A')} g")
+                        st.metric("Calories", f"{format_amount(nutriments.energy_kcal)} kcal")
+                        st.metric("Protein", f"{format_amount(nutriments.proteins)} g")
                     
                     with col2:
-                        st.metric("Carbs", f"{nutriments.get('carbohydrates_100g', 'N/A')} g")
-                        st.metric("Sugar", f"{nutriments.get('sugars_100g', 'N/A')} g")
+                        st.metric("Carbs", f"{format_amount(nutriments.carbohydrates)} g")
+                        st.metric("Sugar", f"{format_amount(nutriments.sugars)} g")
                     
                     with col3:
-                        st.metric("Fat", f"{nutriments.get('fat_100g', 'N/A')} g")
-                        st.metric("Sodium", f"{nutriments.get('sodium_100g', 'N/A')} g")
+                        st.metric("Fat", f"{format_amount(nutriments.fat)} g")
+                        st.metric("Sodium", f"{format_amount(nutriments.sodium)} g")
                     
-                    response_text = f"📊 Here's the nutrition info for **{data.get('product_name')}**: {nutriments.get('energy-kcal_100g', 'N/A')} kcal, {nutriments.get('proteins_100g', 'N/A')}g protein, {nutriments.get('sugars_100g', 'N/A')}g sugar per 100g."
+                    if len(matches) > 1:
+                        with st.expander(f"🔎 {len(matches) - 1} other matches"):
+                            for other in matches[1:]:
+                                st.markdown(f"- **{other.get('product_name', 'Product')}** ({other.get('brands', 'N/A')}) · `{other.get('code', '')}`")
+                    
+                    response_text = f"📊 Here's the nutrition info for **{data.get('product_name')}**: {format_amount(nutriments.energy_kcal)} kcal, {format_amount(nutriments.proteins)}g protein, {format_amount(nutriments.sugars)}g sugar per 100g."
                     
                     add_to_history("Nutrition Query", prompt)
                     st.session_state.messages.append({"role": "assistant", "content": response_text})
                 else:
-                    df = load_optimized_data()
-                    match = df[df['name'].str.contains(prompt, case=False, na=False)]
-                    
-                    if not match.empty:
-                        food = match.iloc[0]
-                        st.markdown(f"""
-                        <div class="glass-card">
-                            <h4>{food['name']}</h4>
-                            <p><strong>Calories:</strong> {food['calories']} kcal</p>
-                            <p><strong>Protein:</strong> {food['protein']}g</p>
-                            <p><strong>Fat:</strong> {food['fat']}g</p>
-                            <p><strong>Sugar:</strong> {food['sugar']}g</p>
-                            <p><strong>Labels:</strong> {food['labels']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        response_text = f"📊 From local database: **{food['name']}** has {food['calories']} kcal, {food['protein']}g protein. Labels: {food['labels']}"
-                        st.session_state.messages.append({"role": "assistant", "content": response_text})
-                    else:
-                        st.error("❌ Couldn't find nutrition data for that item.")
-                        st.session_state.messages.append({"role": "assistant", "content": "I couldn't find nutrition data. Try being more specific or use the barcode scanner!"})
+                    st.error("❌ Couldn't find nutrition data for that item.")
+                    st.session_state.messages.append({"role": "assistant", "content": "I couldn't find nutrition data. Try being more specific or use the barcode scanner!"})
             
             else:
                 st.markdown("### 💡 General Query")
                 
-                df = load_optimized_data()
-                match = df[df['name'].str.contains(prompt, case=False, na=False)]
-                
-                if not match.empty:
-                    food = match.iloc[0]
+                food = load_local_foods().find(prompt)
+                if food is not None:
                     st.markdown(f"""
                     <div class="glass-card">
                         <h4>{food['name']}</h4>
-                        <p>{food['calories']} kcal | {food['protein']}g protein | {food['sugar']}g sugar</p>
+                        <p>{format_amount(food['calories'])} kcal | {format_amount(food['protein'])}g protein | {format_amount(food['sugar'])}g sugar</p>
                         <p><strong>Labels:</strong> {food['labels']}</p>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    response_text = f"I found **{food['name']}** in the database: {food['calories']} kcal, {food['protein']}g protein. {food['labels']}"
+                    response_text = f"I found **{food['name']}** in the database: {format_amount(food['calories'])} kcal, {format_amount(food['protein'])}g protein. {food['labels']}"
                     st.session_state.messages.append({"role": "assistant", "content": response_text})
                 else:
                     with st.spinner("Searching Open Food Facts database..."):
@@ -907,12 +803,12 @@ elif menu == "💬 Chat Interface":
                         st.markdown(f"""
                         <div class="glass-card">
                             <h4>{data.get('product_name', 'Product')}</h4>
-                            <p>{data.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal per 100g</p>
+                            <p>{format_amount(data.nutriments.energy_kcal)} kcal per 100g</p>
                             <p><strong>Nutri-Score:</strong> {data.get('nutriscore_grade', 'N/A').upper()}</p>
                         </div>
                         """, unsafe_allow_html=True)
                         
-                        response_text = f"Found **{data.get('product_name')}** on Open Food Facts: {data.get('nutriments', {}).get('energy-kcal_100g', 'N/A')} kcal, Nutri-Score {data.get('nutriscore_grade', 'N/A').upper()}"
+                        response_text = f"Found **{data.get('product_name')}** on Open Food Facts: {format_amount(data.nutriments.energy_kcal)} kcal, Nutri-Score {data.get('nutriscore_grade', 'N/A').upper()}"
                         st.session_state.messages.append({"role": "assistant", "content": response_text})
                     else:
                         response_text = "I couldn't find specific data. Try:\n- Comparing products ('Compare X vs Y')\n- Scanning a barcode\n- Asking about nutrition\n- Checking safety for your profile"
@@ -959,25 +855,24 @@ elif menu == "📸 Scan Label":
                     """, unsafe_allow_html=True)
                 
                 if p.get('nutriscore_grade'):
-                    st.plotly_chart(generate_enhanced_nutri_score_viz(p.get('nutriscore_grade')), use_container_width=True)
+                    st.plotly_chart(nutri_score_gauge(p.get('nutriscore_grade')), use_container_width=True)
                 
                 st.markdown("### 📊 Nutritional Facts (per 100g)")
-                nutriments = p.get('nutriments', {})
+                nutriments = p.nutriments
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Energy", f"{nutriments.get('energy-kcal_100g', 'N/A')} kcal")
+                    st.metric("Energy", f"{format_amount(nutriments.energy_kcal)} kcal")
                 with col2:
-                    st.metric("Protein", f"{nutriments.get('proteins_100g', 'N/A')} g")
+                    st.metric("Protein", f"{format_amount(nutriments.proteins)} g")
                 with col3:
-                    st.metric("Carbs", f"{nutriments.get('carbohydrates_100g', 'N/A')} g")
+                    st.metric("Carbs", f"{format_amount(nutriments.carbohydrates)} g")
                 with col4:
-                    st.metric("Fat", f"{nutriments.get('fat_100g', 'N/A')} g")
+                    st.metric("Fat", f"{format_amount(nutriments.fat)} g")
                 
                 # Check allergens
                 if st.session_state.profile['allergies']:
-                    ingredients = parse_ingredient_list(p.get('ingredients_text', ''))
-                    allergens = check_allergens(ingredients, st.session_state.profile['allergies'])
+                    allergens = analyze_product(p, st.session_state.profile['allergies'])['allergens']
                     
                     if allergens:
                         st.markdown(f"""
@@ -1011,30 +906,17 @@ elif menu == "⚡ Quick Ask":
     if st.button("🔬 Analyze Now"):
         if txt:
             with st.spinner("Analyzing ingredients..."):
-                ingredients = parse_ingredient_list(txt)
+                analysis = analyze_ingredients(txt, st.session_state.profile['allergies'])
+                ingredients = analysis['ingredients']
+                warnings = analysis['warnings']
                 
                 st.markdown("### 📋 Detected Ingredients")
                 st.write(", ".join(ingredients))
                 
-                warnings = []
-                
-                if any("sugar" in ing.lower() for ing in ingredients):
-                    warnings.append("⚠️ **High Sugar** detected - May spike blood glucose levels")
-                
-                if any("sodium" in ing.lower() or "salt" in ing.lower() for ing in ingredients):
-                    warnings.append("🧂 **High Sodium** detected - Monitor if you have blood pressure concerns")
-                
-                if any("artificial" in ing.lower() or "flavor" in ing.lower() for ing in ingredients):
-                    warnings.append("🧪 **Artificial ingredients** detected - Consider natural alternatives")
-                
-                if any("palm oil" in ing.lower() for ing in ingredients):
-                    warnings.append("🌴 **Palm Oil** detected - Environmental and health concerns")
-                
-                # Check allergens
-                if st.session_state.profile['allergies']:
-                    allergens = check_allergens(ingredients, st.session_state.profile['allergies'])
-                    if allergens:
-                        warnings.append(f"🚨 **ALLERGEN ALERT**: Contains {', '.join(allergens)}")
+                if analysis['additives']:
+                    st.markdown("### 🧪 Additives")
+                    additives = pd.DataFrame([ADDITIVE_INDEX.get(a) for a in analysis['additives']])
+                    st.dataframe(additives[['code', 'name', 'category', 'risk', 'vegan', 'halal']].fillna(''), hide_index=True)
                 
                 if warnings:
                     st.markdown("### ⚠️ Health Warnings")
@@ -1069,7 +951,7 @@ elif menu == "👤 My Profile":
         st.markdown("### 🚫 Allergies & Dietary Restrictions")
         allergies = st.multiselect(
             "Select your allergies:",
-            ["Peanuts", "Dairy", "Gluten", "Soy", "Eggs", "Shellfish", "Tree Nuts", "Fish"],
+            list(ALLERGEN_LEXICON),
             default=st.session_state.profile["allergies"]
         )
         
@@ -1139,21 +1021,27 @@ elif menu == "➕ Add Ingredient":
                     "labels": labels
                 }
                 
-                st.session_state.custom_ingredients.append(new_ingredient)
+                CUSTOM_STORE.add(new_ingredient)
                 st.success(f"✅ Added **{name}** to your custom database!")
                 add_to_history("Add Ingredient", f"Added {name}")
                 st.balloons()
             else:
                 st.error("Please enter an ingredient name!")
     
-    if st.session_state.custom_ingredients:
-        st.markdown("### 📦 Your Custom Ingredients")
+    st.session_state.custom_frame = custom_frame(CUSTOM_STORE, *st.session_state.get('custom_frame', (None, 0)))
+    df_custom = st.session_state.custom_frame[0]
+    if not df_custom.empty:
+        st.markdown("### 📦 Shared Custom Ingredients")
+        st.caption("Everyone using WiseWhisk sees these ingredients; removing one removes it for all users.")
         
-        df_custom = pd.DataFrame(st.session_state.custom_ingredients)
-        st.dataframe(df_custom, use_container_width=True)
+        st.dataframe(df_custom, use_container_width=True, hide_index=True)
         
-        if st.button("🗑️ Clear All Custom Ingredients"):
-            st.session_state.custom_ingredients = []
+        to_remove = st.multiselect("Ingredients to remove", df_custom['name'].tolist())
+        confirmed = st.checkbox("I understand this removes them for everyone")
+        if st.button("🗑️ Remove Selected", disabled=not (to_remove and confirmed)):
+            for name in to_remove:
+                CUSTOM_STORE.remove(name)
+            add_to_history("Remove Ingredient", ", ".join(to_remove))
             st.rerun()
 
 # Database Stats
@@ -1224,6 +1112,12 @@ elif menu == "📊 Database Stats":
         
         st.plotly_chart(fig, use_container_width=True)
     
+    df = load_optimized_data()
+    if not df.empty:
+        st.markdown("### 🥇 Healthiest Items")
+        top = rank_by_health(df, k=10, columns=FOODS_CSV_COLUMNS)
+        st.dataframe(top[["name", "health_score", "calories", "protein", "sugar", "labels"]], use_container_width=True, hide_index=True)
+    
     st.markdown("### 📊 Data Sources")
     st.markdown("""
     <div class="glass-card">
@@ -1260,13 +1154,12 @@ elif menu == "📜 History":
                 </div>
                 """, unsafe_allow_html=True)
         
-        # Export history
-        history_df = pd.DataFrame(st.session_state.history)
-        csv = history_df.to_csv(index=False)
+        # Export history (encoded only when the button is clicked)
+        history = list(st.session_state.history)
         
         st.download_button(
             label="📥 Download History (CSV)",
-            data=csv,
+            data=lambda: export_bytes(history, "csv"),
             file_name=f"wisewhisk_history_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv"
         )